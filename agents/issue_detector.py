@@ -256,6 +256,7 @@ import csv
 import datetime
 from core.sovereign_bus import bus
 from core.base_agent import BaseAgent
+from core.csv_tail import to_number
 
 class IssueDetector(BaseAgent):
     """Detects failures based on configurable thresholds from config.py."""
@@ -295,14 +296,14 @@ class IssueDetector(BaseAgent):
             # === 1️⃣ Data-based anomaly detection ===
             if os.path.exists(self.data_file):
                 if "student_scores" in self.data_file:
-                    df = self._safe_read_csv(self.data_file)
-                    if df.empty:
+                    reader = self._tail_csv(self.data_file, aggregate=("score",))
+                    if not reader.row_count:
                         return "no_failure", "Data file corrupted or inaccessible"
                     
-                    if not df.empty and "score" in df.columns:
+                    if "score" in reader.header:
                         try:
-                            avg_score = pd.to_numeric(df["score"], errors='coerce').mean()
-                            if pd.isna(avg_score):
+                            avg_score = reader.mean("score")
+                            if avg_score is None:
                                 return "no_failure", "Invalid score data format"
                             if avg_score < self.low_score_threshold:
                                 state, reason = "anomaly_score", f"Low student performance (avg={avg_score:.2f})"
@@ -312,25 +313,25 @@ class IssueDetector(BaseAgent):
                             return "no_failure", f"Score calculation error: {e}"
 
                 elif "patient_health" in self.data_file:
-                    df = self._safe_read_csv(self.data_file)
-                    if df.empty:
+                    reader = self._tail_csv(self.data_file)
+                    if not reader.row_count:
                         return "no_failure", "Health data file corrupted or inaccessible"
                     
-                    if not df.empty:
+                    if reader.row_count:
                         try:
-                            last_row = df.iloc[-1]
-                            hr = pd.to_numeric(last_row.get("heart_rate", 0), errors='coerce')
-                            o2 = pd.to_numeric(last_row.get("oxygen_level", 100), errors='coerce')
+                            last_row = reader.last_row()
+                            hr = to_number(last_row.get("heart_rate", 0))
+                            o2 = to_number(last_row.get("oxygen_level", 100))
                             
-                            if pd.isna(hr) or pd.isna(o2):
+                            if hr is None or o2 is None:
                                 return "no_failure", "Invalid health data format"
                             
                             if hr > self.high_hr_threshold:
-                                state, reason = "anomaly_health", f"High heart rate detected ({hr})."
+                                state, reason = "anomaly_health", f"High heart rate detected ({hr:g})."
                                 self._log_issue(state, reason)
                                 return state, reason
                             if o2 < self.low_o2_threshold:
-                                state, reason = "anomaly_health", f"Low oxygen detected ({o2})."
+                                state, reason = "anomaly_health", f"Low oxygen detected ({o2:g})."
                                 self._log_issue(state, reason)
                                 return state, reason
                         except Exception as e:
@@ -338,21 +339,21 @@ class IssueDetector(BaseAgent):
 
             # === 2️⃣ Deployment-based issue detection ===
             if hasattr(self, 'log_file') and os.path.exists(self.log_file):
-                df = self._safe_read_csv(self.log_file)
-                if df.empty:
+                reader = self._tail_csv(self.log_file)
+                if not reader.row_count:
                     return "no_failure", "Deployment log corrupted or inaccessible"
                 
-                if not df.empty:
+                if reader.row_count:
                     try:
-                        last = df.iloc[-1]
+                        last = reader.last_row()
                         status = str(last.get("status", "")).lower().strip()
-                        rt = pd.to_numeric(last.get("response_time_ms"), errors="coerce")
+                        rt = to_number(last.get("response_time_ms"))
                         
                         if status == "failure":
                             state, reason = "deployment_failure", "Last deployment attempt failed."
                             self._log_issue(state, reason)
                             return state, reason
-                        if pd.notna(rt) and rt > self.latency_threshold_ms:
+                        if rt is not None and rt > self.latency_threshold_ms:
                             state, reason = "latency_issue", f"High latency detected: {rt:.2f} ms."
                             self._log_issue(state, reason)
                             return state, reason
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Bytes on the wire and serialize time for MCP outbox payloads in each encoding."""
+
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime
+from core import mcp_codec
+
+def sample_outbox(count):
+    """A full outbox of the deploy.* and rl.learned messages MCPBridge forwards."""
+    messages = []
+    for n in range(count):
+        if n % 3 == 2:
+            event_type = "rl.learned"
+            payload = {"state": "high_latency", "action": "restart_service", "reward": 0.85,
+                       "q_value": round(0.5 + n * 0.001, 4), "episode": n}
+        else:
+            event_type = "deploy.success" if n % 3 == 0 else "deploy.failure"
+            payload = {"deployment_id": f"deploy_{n:05d}", "status": event_type.split(".")[1],
+                       "response_time": 120 + n % 50, "dataset": "dataset/student_scores.csv",
+                       "timestamp": datetime(2025, 1, 1, 10, 0, n % 60).isoformat()}
+        messages.append({
+            "context_id": f"ctx_20250101_100000_{n:03d}",
+            "timestamp": datetime(2025, 1, 1, 10, 0, n % 60).isoformat(),
+            "event_type": event_type,
+            "payload": payload,
+            "source": "sovereign_bus",
+            "offset": n
+        })
+    return messages
+
+def measure(encode, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = encode()
+    return len(body), (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100, help="Messages in the outbox (default: outbox size)")
+    parser.add_argument("--repeat", type=int, default=200, help="Encodings timed per format")
+    args = parser.parse_args()
+
+    outbox = sample_outbox(args.messages)
+    encodings = [
+        ("json indent=2 (before)", lambda: json.dumps(outbox, indent=2).encode()),
+        ("json default separators", lambda: json.dumps(outbox).encode()),
+        ("json compact", lambda: mcp_codec.dumps(outbox)),
+        ("json compact + gzip", lambda: mcp_codec.compress(mcp_codec.dumps(outbox))),
+        ("json indent=2 + gzip -9", lambda: gzip.compress(json.dumps(outbox, indent=2).encode(), 9)),
+    ]
+    if mcp_codec.msgpack is not None:
+        encodings.append(("msgpack", lambda: mcp_codec.encode(outbox, mcp_codec.MSGPACK_TYPES[0])))
+        encodings.append(("msgpack + gzip", lambda: mcp_codec.compress(
+            mcp_codec.encode(outbox, mcp_codec.MSGPACK_TYPES[0]))))
+    else:
+        print("ℹ️  msgpack not installed; MessagePack rows skipped (endpoints fall back to compact JSON)")
+
+    baseline = None
+    print(f"📊 {args.messages} outbox messages, {args.repeat} runs each")
+    print(f"  {'encoding':28s} {'bytes':>8s} {'vs before':>10s} {'ms/encode':>10s}")
+    for label, encode in encodings:
+        size, ms = measure(encode, args.repeat)
+        baseline = baseline or size
+        print(f"  {label:28s} {size:8d} {size / baseline:9.0%} {ms:10.3f}")
+
+if __name__ == "__main__":
+    main()
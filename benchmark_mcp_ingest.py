@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Compare MCP inbox ingest throughput: one POST per message vs POST /mcp_inbox/batch."""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import mcp_endpoints
+from core.mcp_bridge import MCPBridge
+
+class QuietHandler(mcp_endpoints.MCPHandler):
+    def log_message(self, format, *args):
+        pass
+
+def sample_message(n):
+    """A realistic external alert as posted by MCP agents."""
+    return {
+        "context_id": f"ctx_bench_{n:06d}",
+        "timestamp": "2025-01-01T10:00:00",
+        "event_type": "external.alert",
+        "payload": {"message": "Latency above threshold", "service": "dashboard", "latency_ms": 180 + n % 40},
+        "source": "mcp_agent"
+    }
+
+def post(conn, path, body):
+    conn.request("POST", path, body, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path} returned {response.status}")
+
+def run_single(port, count):
+    conn = http.client.HTTPConnection("localhost", port)
+    started = time.perf_counter()
+    for n in range(count):
+        post(conn, "/mcp_inbox", json.dumps(sample_message(n)))
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+def run_batch(port, count, batch_size, ndjson=False):
+    conn = http.client.HTTPConnection("localhost", port)
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        messages = [sample_message(n) for n in range(start, min(count, start + batch_size))]
+        if ndjson:
+            body = "\n".join(json.dumps(m) for m in messages)
+        else:
+            body = json.dumps(messages)
+        post(conn, "/mcp_inbox/batch", body)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000, help="Messages per run")
+    parser.add_argument("--batch-size", type=int, default=500, help="Messages per batch request")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    # Ingest only: no inbox worker, so the numbers measure the request path
+    mcp_endpoints.mcp_bridge = MCPBridge(
+        inbox_path=None,
+        outbox_path=os.path.join(temp_dir, "mcp_outbox.json"),
+        inbox_dir=os.path.join(temp_dir, "mcp_inbox"),
+    )
+    server = mcp_endpoints.PooledHTTPServer(("localhost", 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    try:
+        print(f"📊 Ingesting {args.count} messages (batch size {args.batch_size})")
+        for label, run in [
+            ("POST /mcp_inbox", lambda: run_single(port, args.count)),
+            ("POST /mcp_inbox/batch (JSON)", lambda: run_batch(port, args.count, args.batch_size)),
+            ("POST /mcp_inbox/batch (NDJSON)", lambda: run_batch(port, args.count, args.batch_size, ndjson=True)),
+        ]:
+            elapsed = run()
+            print(f"  {label:32s} {elapsed:7.3f}s  {args.count / elapsed:10.0f} msg/s")
+    finally:
+        server.shutdown()
+        server.server_close()
+        mcp_endpoints.mcp_bridge.close()
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
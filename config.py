@@ -8,4 +8,52 @@ THRESHOLDS = {
     # Patient Health thresholds
     "high_heart_rate": 120,     # Patient heart rate upper limit
     "low_oxygen_level": 95      # Patient oxygen level lower limit
-}
\ No newline at end of file
+}
+
+# Subscriber dispatch for the event buses ("sync" runs callbacks inline,
+# "pooled" hands them to worker threads through bounded per-subscriber queues)
+BUS_DISPATCH = {
+    "mode": "sync",
+    "max_workers": 4,           # Worker threads draining subscriber queues
+    "queue_size": 1000,         # Per-subscriber queue capacity
+    "policy": "block"           # block | drop_oldest | drop_newest
+}
+
+# RealtimeBus performance logging (rows are aggregated in memory per topic)
+BUS_METRICS = {
+    "flush_interval": 5.0,      # Seconds between performance_log writes
+    "flush_every": 0,           # Also flush after N messages (0 = interval only)
+    "latency_sample_rate": 1.0  # Fraction of publishes timed for latency percentiles
+}
+
+# RealtimeBus per-topic buffers
+BUS_BUFFERS = {
+    "buffer_capacity": 10000,           # Messages kept per topic
+    "eviction_policy": "drop_oldest",   # drop_oldest | drop_newest
+    "buffer_mode": "on_demand"          # always | on_demand (skip buffering push-only topics)
+}
+
+# MCPAdapter bus -> MCPManager forwarding
+MCP_FORWARDER = {
+    "max_delay": 0.05,          # Seconds a forwarded event may wait to share a write
+    "max_batch": 500,           # Events per write
+    "collapse_superseded": True # Keep only the newest pending rl.learned per (state, action)
+}
+
+# MCP HTTP endpoint server (mcp_endpoints.py)
+MCP_SERVER = {
+    "host": "localhost",
+    "port": 8080,
+    "max_workers": 16,          # Connections served concurrently
+    "max_queued": 64,           # Accepted connections waiting for a worker; beyond this -> 503
+    "max_streams": 8,           # Workers SSE streams and long-polls may hold (< max_workers); beyond this -> 503
+    "keepalive_timeout": 15.0,  # Seconds an idle keep-alive connection may hold a worker
+    "max_wait": 30.0,           # Longest long-poll (?wait=) a GET /mcp_outbox may block
+    "stream_heartbeat": 15.0    # Seconds between SSE keep-alive comments on /mcp_outbox/stream
+}
+
+# BaseAgent CSV logs (one open writer per agent; rows are also flushed at exit)
+AGENT_LOG = {
+    "flush_every": 1,           # Flush after N rows (1 = every row, readers see it at once; 0 = off)
+    "flush_interval": 0.0       # Also flush every T seconds from a background thread (0 = off)
+}
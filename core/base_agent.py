@@ -1,18 +1,29 @@
 import os
 import csv
 import datetime
+import logging
 import pandas as pd
 from abc import ABC, abstractmethod
+from config import AGENT_LOG
+from core.csv_log import BufferedCSVWriter
+from core.csv_tail import TailingCSVReader
 from core.logger import AgentLogger
 
 class BaseAgent(ABC):
-    """Base class for all agents with common functionality."""
+    """Base class for all agents with common functionality.
+
+    Log rows go through one ``BufferedCSVWriter`` per agent; its flush
+    policy comes from ``config.AGENT_LOG``. Use the agent as a context
+    manager, or call ``flush``/``close``, to force buffered rows out.
+    """
     
     def __init__(self, log_file_path: str, agent_name: str = None):
         self.log_file = log_file_path
         self.agent_name = agent_name or self.__class__.__name__
         self.logger = AgentLogger(self.agent_name)
         self._initialize_log_file()
+        self.csv_log = BufferedCSVWriter(self.log_file, self.get_log_headers(), **AGENT_LOG)
+        self._tail_readers = {}
         self.logger.info(f"Initialized {self.agent_name}")
     
     def _initialize_log_file(self):
@@ -26,12 +37,25 @@ class BaseAgent(ABC):
     def _log_entry(self, data: dict):
         """Log an entry with automatic timestamp."""
         data['timestamp'] = datetime.datetime.now().isoformat()
-        with open(self.log_file, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=self.get_log_headers())
-            writer.writerow(data)
+        self.csv_log.write(data)
         
         # Also log to standard logger
-        self.logger.debug(f"CSV entry logged", **{k: str(v) for k, v in data.items() if k != 'timestamp'})
+        if self.logger.is_enabled(logging.DEBUG):
+            self.logger.debug(f"CSV entry logged", **{k: str(v) for k, v in data.items() if k != 'timestamp'})
+    
+    def flush(self):
+        """Write buffered log rows to disk."""
+        self.csv_log.flush()
+    
+    def close(self):
+        """Flush and close the log file; a later entry reopens it."""
+        self.csv_log.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
     def _safe_read_csv(self, file_path: str) -> pd.DataFrame:
         """Safely read CSV with comprehensive error handling."""
@@ -46,6 +70,23 @@ class BaseAgent(ABC):
             self.logger.error(f"Failed to read CSV: {file_path}", error=str(e))
             return pd.DataFrame()
     
+    def _tail_csv(self, file_path: str, aggregate: tuple = ()) -> TailingCSVReader:
+        """Up-to-date incremental reader for a growing CSV; parses only appended rows.
+        
+        Cheaper than ``_safe_read_csv`` for repeated checks of the last rows
+        or a running mean. Read errors are logged and leave the reader empty.
+        """
+        reader = self._tail_readers.get(file_path)
+        if reader is None or not set(aggregate) <= set(reader.aggregate):
+            columns = set(aggregate) | set(reader.aggregate if reader else ())
+            reader = self._tail_readers[file_path] = TailingCSVReader(file_path, aggregate=sorted(columns))
+        try:
+            reader.refresh()
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            self.logger.error(f"Failed to read CSV: {file_path}", error=str(e))
+            reader.reset()
+        return reader
+    
     @abstractmethod
     def get_log_headers(self) -> list:
         """Return list of log file headers."""
@@ -0,0 +1,174 @@
+import atexit
+import csv
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+PERFORMANCE_HEADERS = ['timestamp', 'event_type', 'throughput_per_sec', 'queue_size', 'total_messages']
+LATENCY_HEADERS = ['timestamp', 'topic', 'messages', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, math.ceil(pct / 100.0 * len(samples)) - 1))
+    return samples[rank]
+
+
+class _TopicWindow:
+    __slots__ = ('count', 'seen', 'queue_size', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.seen = 0       # Latency observations offered to the reservoir
+        self.queue_size = 0
+        self.samples: List[float] = []
+
+
+class BusMetrics:
+    """Aggregate publish metrics in memory and write them in the background.
+
+    Publishers only bump per-topic counters. Every ``flush_interval``
+    seconds (or after ``flush_every`` messages) one row per active topic is
+    appended to the performance log, using the same columns the dashboard
+    already reads; ``throughput_per_sec`` is the topic's rate over the
+    interval. Publish-latency percentiles go to a companion latency log.
+    Only ``latency_sample_rate`` of publishes are timed into a bounded
+    reservoir per topic.
+    """
+
+    def __init__(self, performance_log: str = "logs/performance_log.csv", latency_log: str = None,
+                 flush_interval: float = 5.0, flush_every: int = 0,
+                 latency_sample_rate: float = 1.0, reservoir_size: int = 1024):
+        self.performance_log = performance_log
+        self.latency_log = latency_log or os.path.join(os.path.dirname(performance_log) or ".", "bus_latency_log.csv")
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.latency_sample_rate = latency_sample_rate
+        self.reservoir_size = reservoir_size
+        self.total_messages = 0
+        self._windows: Dict[str, _TopicWindow] = {}
+        self._pending = 0
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._init_log(self.performance_log, PERFORMANCE_HEADERS)
+        self._init_log(self.latency_log, LATENCY_HEADERS)
+        atexit.register(self.close)
+
+    def _init_log(self, path: str, headers: List[str]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, 'w', newline='') as f:
+                csv.writer(f).writerow(headers)
+
+    def should_sample(self) -> bool:
+        """Whether the caller should time this publish."""
+        return self.latency_sample_rate >= 1.0 or random.random() < self.latency_sample_rate
+
+    def record(self, topic: str, queue_size: int, latency: float = None, count: int = 1):
+        """Count ``count`` published messages; ``latency`` is in seconds."""
+        with self._lock:
+            window = self._windows.get(topic)
+            if window is None:
+                window = self._windows[topic] = _TopicWindow()
+            window.count += count
+            window.queue_size = queue_size
+            self.total_messages += count
+            self._pending += count
+            if latency is not None:
+                window.seen += 1
+                if len(window.samples) < self.reservoir_size:
+                    window.samples.append(latency)
+                else:
+                    slot = random.randrange(window.seen)
+                    if slot < self.reservoir_size:
+                        window.samples[slot] = latency
+            flush_now = self.flush_every and self._pending >= self.flush_every
+
+        if self._thread is None:
+            self._start()
+        if flush_now:
+            self._wake.set()
+
+    def latency_snapshot(self) -> Dict[str, float]:
+        """Publish-latency percentiles (ms) across topics in the current window."""
+        with self._lock:
+            samples = sorted(s for w in self._windows.values() for s in w.samples)
+        return {
+            'p50': percentile(samples, 50) * 1000,
+            'p95': percentile(samples, 95) * 1000,
+            'p99': percentile(samples, 99) * 1000,
+        }
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="bus-metrics", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write one row per topic that saw traffic since the last flush."""
+        with self._flush_lock:
+            with self._lock:
+                windows, self._windows = self._windows, {}
+                total = self.total_messages
+                self._pending = 0
+                now = time.time()
+                elapsed = max(now - self._window_start, 1e-6)
+                self._window_start = now
+            if not windows:
+                return
+
+            timestamp = datetime.now().isoformat()
+            performance_rows, latency_rows = [], []
+            for topic, window in windows.items():
+                performance_rows.append([
+                    timestamp,
+                    f"message_published_{topic}",
+                    f"{window.count / elapsed:.2f}",
+                    window.queue_size,
+                    total
+                ])
+                if window.samples:
+                    samples = sorted(window.samples)
+                    latency_rows.append([
+                        timestamp, topic, window.count,
+                        f"{percentile(samples, 50) * 1000:.3f}",
+                        f"{percentile(samples, 95) * 1000:.3f}",
+                        f"{percentile(samples, 99) * 1000:.3f}",
+                        f"{samples[-1] * 1000:.3f}"
+                    ])
+
+            try:
+                with open(self.performance_log, 'a', newline='') as f:
+                    csv.writer(f).writerows(performance_rows)
+                if latency_rows:
+                    with open(self.latency_log, 'a', newline='') as f:
+                        csv.writer(f).writerows(latency_rows)
+            except IOError as e:
+                print(f"Bus metrics write error: {e}")
+
+    def close(self):
+        """Stop the writer thread and flush what is left."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.flush()
@@ -0,0 +1,176 @@
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from core.bus_metrics import percentile
+
+
+class CoalescingForwarder:
+    """Collect items for a short window and hand them to ``sink`` in batches.
+
+    A batch is written ``max_delay`` seconds after its first item arrives,
+    or as soon as it holds ``max_batch`` items, by a background thread, so
+    ``submit`` never waits on I/O. When ``collapse_key`` returns a key for
+    an item, a pending item with the same key is superseded: the older one
+    is dropped and the newer one is queued in its place at the end.
+
+    If ``sink`` raises, the unwritten items go back to the front of the
+    queue and are retried with the next batch; after ``max_retries``
+    failures in a row they are dropped and counted in ``stats()``.
+    """
+
+    def __init__(self, sink: Callable[[List[Any]], None], max_delay: float = 0.05, max_batch: int = 500,
+                 collapse_key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+                 name: str = "forwarder", history: int = 256, max_retries: int = 3):
+        self.sink = sink
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.collapse_key = collapse_key
+        self.name = name
+        self.max_retries = max_retries
+        self.submitted = 0
+        self.collapsed = 0
+        self.batches = 0
+        self.forwarded = 0
+        self.failures = 0
+        self.dropped = 0
+        self._attempts = 0  # Consecutive failed writes
+        self._pending: List[Any] = []
+        self._keys: Dict[Hashable, int] = {}  # collapse key -> index in _pending
+        self._first_at = 0.0
+        self._batch_sizes = deque(maxlen=history)
+        self._latencies = deque(maxlen=history)  # Seconds from first pending item to write done
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        atexit.register(self.close)
+
+    def submit(self, item: Any):
+        with self._lock:
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self.submitted += 1
+            key = self.collapse_key(item) if self.collapse_key else None
+            if key is not None:
+                previous = self._keys.get(key)
+                if previous is not None:
+                    self._pending[previous] = None
+                    self.collapsed += 1
+                self._keys[key] = len(self._pending)
+            self._pending.append(item)
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._ready.notify()
+
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            with self._ready:
+                while not self._pending and not self._stopped.is_set():
+                    self._ready.wait()
+                while not self._stopped.is_set() and len(self._pending) < self.max_batch:
+                    remaining = self._first_at + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+            self.flush()
+
+    def flush(self):
+        """Write everything pending now, in chunks of at most ``max_batch``."""
+        with self._flush_lock:
+            with self._lock:
+                pending, first_at = self._pending, self._first_at
+                self._pending, self._keys = [], {}
+            items = [item for item in pending if item is not None]
+            if not items:
+                return
+            sent = 0
+            try:
+                for start in range(0, len(items), self.max_batch):
+                    chunk = items[start:start + self.max_batch]
+                    self.sink(chunk)
+                    sent += len(chunk)
+            except Exception as e:
+                print(f"{self.name} error: {e}")
+                self._requeue(items[sent:])
+            else:
+                self._attempts = 0
+            if not sent:
+                return
+            with self._lock:
+                self.batches += 1
+                self.forwarded += sent
+                self._batch_sizes.append(sent)
+                self._latencies.append(time.monotonic() - first_at)
+
+    def _requeue(self, items: List[Any]):
+        """Put items a failed write did not deliver back in front of newer ones."""
+        with self._lock:
+            self.failures += 1
+            self._attempts += 1
+            if self._attempts > self.max_retries:
+                self._attempts = 0
+                self.dropped += len(items)
+                print(f"{self.name} dropped {len(items)} items after {self.max_retries} retries")
+                return
+            requeued, keys = [], {}
+            for item in items:
+                key = self.collapse_key(item) if self.collapse_key else None
+                if key is not None:
+                    if key in self._keys:  # A newer item arrived meanwhile
+                        self.collapsed += 1
+                        continue
+                    keys[key] = len(requeued)
+                requeued.append(item)
+            for key, index in self._keys.items():
+                keys[key] = index + len(requeued)
+            self._keys = keys
+            self._pending = requeued + self._pending
+            self._first_at = time.monotonic()  # Retry after another max_delay
+            self._ready.notify()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus batch-size and flush-latency summaries over recent batches."""
+        with self._lock:
+            sizes = sorted(self._batch_sizes)
+            latencies = sorted(self._latencies)
+            return {
+                "submitted": self.submitted,
+                "forwarded": self.forwarded,
+                "collapsed": self.collapsed,
+                "batches": self.batches,
+                "pending": sum(1 for item in self._pending if item is not None),
+                "failures": self.failures,
+                "dropped": self.dropped,
+                "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+                "max_batch_size": sizes[-1] if sizes else 0,
+                "flush_latency_p50_ms": percentile(latencies, 50) * 1000,
+                "flush_latency_p95_ms": percentile(latencies, 95) * 1000,
+                "flush_latency_max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+            }
+
+    def close(self):
+        """Stop the writer thread and flush what is left."""
+        self._stopped.set()
+        with self._ready:
+            self._ready.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.flush()
+        with self._lock:
+            left = sum(1 for item in self._pending if item is not None)
+            if left:
+                self.dropped += left
+                print(f"{self.name} dropped {left} unwritten items at close")
+            self._pending, self._keys = [], {}
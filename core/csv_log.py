@@ -0,0 +1,96 @@
+import atexit
+import csv
+import os
+import threading
+from typing import Dict, List
+
+
+class BufferedCSVWriter:
+    """Append rows to a CSV log through one long-lived file handle.
+
+    The file is opened once, on the first row, and rows are flushed to
+    disk every ``flush_every`` rows (1 = after each row) and at least every
+    ``flush_interval`` seconds by a background thread; 0 disables either
+    trigger. Whatever is left is flushed by ``flush``, ``close``, leaving a
+    ``with`` block, or at interpreter exit.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str], flush_every: int = 1, flush_interval: float = 0.0):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        atexit.register(self.close)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, 'a', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+
+    def write(self, row: Dict):
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._writer.writerow(row)
+            self.rows += 1
+            self._pending += 1
+            if self.flush_every and self._pending >= self.flush_every:
+                self._flush_locked()
+
+        if self.flush_interval and self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None or self._stopped.is_set():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"csv-log:{os.path.basename(self.path)}",
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self.flush()
+
+    def _flush_locked(self):
+        if self._pending:
+            self._file.flush()
+            self._pending = 0
+
+    def flush(self):
+        """Push buffered rows to the file."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Stop the flush thread, flush and close the file.
+
+        A later ``write`` reopens the file, so closing is always safe.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        with self._lock:
+            self._thread = None
+            if self._file is not None:
+                self._flush_locked()
+                self._file.close()
+                self._file = self._writer = None
+        self._stopped.clear()
+        self._wake.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
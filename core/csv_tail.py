@@ -0,0 +1,143 @@
+import csv
+import io
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+_CHECK_BYTES = 64  # Bytes before the read offset compared to spot in-place rewrites
+
+
+class ColumnStats:
+    """Running count/sum/min/max of the numeric values seen in one column."""
+
+    __slots__ = ("count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value: Optional[str]):
+        number = to_number(value)
+        if number is None:
+            return
+        self.count += 1
+        self.total += number
+        self.minimum = number if self.minimum is None else min(self.minimum, number)
+        self.maximum = number if self.maximum is None else max(self.maximum, number)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+def to_number(value) -> Optional[float]:
+    """``float(value)``, or None for blanks and non-numbers (like ``pd.to_numeric(errors='coerce')``)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number  # NaN
+
+
+class TailingCSVReader:
+    """Follow a CSV file that grows by appends, parsing only the new rows.
+
+    ``refresh`` remembers the byte offset it has parsed up to and the
+    file's inode. When the file was replaced (new inode), truncated, or
+    rewritten in place (the bytes just before the offset changed), it
+    starts over from the header; otherwise it reads from the offset to the
+    last complete line, so a row still being written is picked up next
+    time. The last ``keep`` rows are held as dicts for ``last_row`` and
+    ``tail``, and the columns named in ``aggregate`` keep running numeric
+    stats over every row for ``mean``/``stats``.
+    """
+
+    def __init__(self, path: str, keep: int = 100, aggregate: Iterable[str] = ()):
+        self.path = path
+        self.keep = keep
+        self.aggregate = tuple(aggregate)
+        self.reparses = 0
+        self.reset()
+
+    def reset(self):
+        """Forget everything parsed; the next ``refresh`` reads from the header."""
+        self.header: Optional[List[str]] = None
+        self.row_count = 0
+        self._rows = deque(maxlen=self.keep)
+        self._stats = {column: ColumnStats() for column in self.aggregate}
+        self._inode = None
+        self._offset = 0
+        self._check = b""
+
+    def refresh(self) -> int:
+        """Parse rows appended since the last call; returns how many were added.
+
+        A missing file reads as empty. ``OSError``, ``UnicodeDecodeError``
+        and ``csv.Error`` propagate; the offset only advances on success.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self.reset()
+            return 0
+
+        with open(self.path, "rb") as f:
+            if self._inode is not None and not self._unchanged(f, st):
+                self.reset()
+                self.reparses += 1
+            if st.st_size == self._offset:
+                self._inode = st.st_ino
+                return 0
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            return 0  # Only a partial line so far
+        data = chunk[:end]
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+
+        added = 0
+        for row in rows:
+            if not row:
+                continue  # Blank line
+            if self.header is None:
+                self.header = row
+                continue
+            record = dict(zip(self.header, row))
+            self._rows.append(record)
+            for column, stats in self._stats.items():
+                stats.add(record.get(column))
+            added += 1
+        self.row_count += added
+        self._inode = st.st_ino
+        self._offset += end
+        self._check = (self._check + data[-_CHECK_BYTES:])[-_CHECK_BYTES:]
+        return added
+
+    def _unchanged(self, f, st) -> bool:
+        """Whether the file is still the one parsed so far, only possibly longer."""
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            return False
+        f.seek(self._offset - len(self._check))
+        return f.read(len(self._check)) == self._check
+
+    def last_row(self) -> Optional[Dict[str, str]]:
+        return self._rows[-1] if self._rows else None
+
+    def tail(self, n: int) -> List[Dict[str, str]]:
+        """Up to the last ``n`` rows (at most ``keep``), oldest first."""
+        if n <= 0:
+            return []
+        return list(self._rows)[-n:]
+
+    def stats(self, column: str) -> ColumnStats:
+        """Running stats for an ``aggregate`` column."""
+        return self._stats[column]
+
+    def mean(self, column: str) -> Optional[float]:
+        """Mean of the numeric values in an ``aggregate`` column, or None if there are none."""
+        return self._stats[column].mean
@@ -0,0 +1,237 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+def subscriber_name(callback: Callable) -> str:
+    """Readable identifier for a subscriber callback."""
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class SyncDispatcher:
+    """Invoke subscribers inline on the publisher's thread.
+
+    Coroutine subscribers are not run inline: the coroutine they return is
+    scheduled on ``loop`` (see ``attach_loop``) with
+    ``run_coroutine_threadsafe``, so publishers never wait on them.
+    """
+
+    def __init__(self, error_label: str = "Subscriber error"):
+        self.error_label = error_label
+        self.loop = None
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Register the event loop that runs coroutine subscribers."""
+        self.loop = loop
+
+    def dispatch(self, callbacks: Iterable[Callable], message: dict):
+        """Deliver ``message`` to each callback before returning."""
+        for callback in callbacks:
+            self._invoke(callback, message)
+
+    def dispatch_many(self, callbacks: Iterable[Callable], messages: List[dict]):
+        """Deliver a batch of messages; each callback sees them in order."""
+        for callback in callbacks:
+            for message in messages:
+                self._invoke(callback, message)
+
+    def _invoke(self, callback: Callable, message: dict):
+        try:
+            result = callback(message)
+            if asyncio.iscoroutine(result):
+                self._schedule(result)
+        except Exception as e:
+            print(f"{self.error_label}: {e}")
+
+    def _schedule(self, coro):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            coro.close()
+            raise RuntimeError(f"no event loop attached for coroutine subscriber {coro.__qualname__}")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        future.add_done_callback(self._report_async_error)
+
+    def _report_async_error(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"{self.error_label}: {future.exception()}")
+
+    def discard(self, callback: Callable):
+        """Forget any per-subscriber state kept for ``callback``."""
+
+    def flush(self, timeout: float = None) -> bool:
+        """Nothing is ever pending in sync mode."""
+        return True
+
+    def get_stats(self) -> dict:
+        return {"mode": "sync", "subscribers": {}}
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class SubscriberQueue:
+    """Bounded per-subscriber mailbox with a backpressure policy."""
+
+    def __init__(self, callback: Callable, capacity: int, policy: str):
+        self.callback = callback
+        self.name = subscriber_name(callback)
+        self.capacity = capacity
+        self.policy = policy
+        self.items = deque()
+        self.lock = threading.Lock()
+        self.not_full = threading.Condition(self.lock)
+        self.scheduled = False  # A worker currently owns this mailbox
+        self.delivered = 0
+        self.dropped = 0
+        self.max_lag = 0
+
+    def offer_many(self, messages: Iterable[dict], schedule: Callable):
+        """Enqueue messages under one lock acquisition.
+
+        ``schedule`` is called once when an idle mailbox receives work, and
+        before blocking on a full one, so a worker is always on its way.
+        """
+        with self.lock:
+            for message in messages:
+                if len(self.items) >= self.capacity:
+                    if self.policy == "drop_newest":
+                        self.dropped += 1
+                        continue
+                    if self.policy == "drop_oldest":
+                        self.items.popleft()
+                        self.dropped += 1
+                    else:
+                        while len(self.items) >= self.capacity:
+                            self.not_full.wait()
+                self.items.append(message)
+                self.max_lag = max(self.max_lag, len(self.items))
+                if not self.scheduled:
+                    self.scheduled = True
+                    schedule(self)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "lag": len(self.items),
+                "max_lag": self.max_lag,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "policy": self.policy,
+            }
+
+
+class PooledDispatcher(SyncDispatcher):
+    """Deliver messages through per-subscriber bounded queues.
+
+    Publishing only enqueues; a shared thread pool drains the mailboxes.
+    At most one worker drains a given mailbox at a time, so each
+    subscriber still sees messages in publish order. With the ``block``
+    policy a subscriber that publishes back onto a full mailbox of its
+    own will deadlock; use a drop policy for such feedback loops.
+    """
+
+    def __init__(self, max_workers: int = 4, queue_size: int = 1000, policy: str = "block",
+                 batch_size: int = 100, error_label: str = "Subscriber error"):
+        super().__init__(error_label)
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bus-dispatch")
+        self._mailboxes: Dict[Callable, SubscriberQueue] = {}
+        self._mailboxes_lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._busy = 0
+
+    def dispatch(self, callbacks: Iterable[Callable], message: dict):
+        """Enqueue ``message`` for each callback and return immediately."""
+        self.dispatch_many(callbacks, (message,))
+
+    def dispatch_many(self, callbacks: Iterable[Callable], messages: List[dict]):
+        """Enqueue a batch for each callback with one lock round-trip each."""
+        for callback in callbacks:
+            self._mailbox_for(callback).offer_many(messages, self._schedule_drain)
+
+    def _schedule_drain(self, mailbox: SubscriberQueue):
+        with self._idle:
+            self._busy += 1
+        self._executor.submit(self._drain, mailbox)
+
+    def discard(self, callback: Callable):
+        with self._mailboxes_lock:
+            mailbox = self._mailboxes.get(callback)
+            if mailbox is not None and not mailbox.scheduled:
+                del self._mailboxes[callback]
+
+    def _mailbox_for(self, callback: Callable) -> SubscriberQueue:
+        mailbox = self._mailboxes.get(callback)
+        if mailbox is None:
+            with self._mailboxes_lock:
+                mailbox = self._mailboxes.setdefault(
+                    callback, SubscriberQueue(callback, self.queue_size, self.policy)
+                )
+        return mailbox
+
+    def _drain(self, mailbox: SubscriberQueue):
+        """Deliver up to one batch, then yield the worker to other mailboxes."""
+        for _ in range(self.batch_size):
+            with mailbox.lock:
+                if not mailbox.items:
+                    break
+                message = mailbox.items.popleft()
+                mailbox.not_full.notify()
+            self._invoke(mailbox.callback, message)
+            with mailbox.lock:
+                mailbox.delivered += 1
+
+        with mailbox.lock:
+            if mailbox.items:
+                self._executor.submit(self._drain, mailbox)
+                return
+            mailbox.scheduled = False
+        with self._idle:
+            self._busy -= 1
+            self._idle.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every mailbox is drained; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def get_stats(self) -> dict:
+        """Per-subscriber lag, drop and delivery counters."""
+        with self._mailboxes_lock:
+            mailboxes = list(self._mailboxes.values())
+        subscribers = {}
+        for mailbox in mailboxes:
+            name = mailbox.name
+            if name in subscribers:
+                name = f"{name}#{len(subscribers)}"
+            subscribers[name] = mailbox.stats()
+        return {"mode": "pooled", "subscribers": subscribers}
+
+    def shutdown(self, wait: bool = True):
+        if wait:
+            self.flush()
+        self._executor.shutdown(wait=wait)
+
+
+def make_dispatcher(mode: str = "sync", **options) -> SyncDispatcher:
+    """Build a dispatcher from a mode name (``sync`` or ``pooled``)."""
+    if mode == "sync":
+        return SyncDispatcher(options.get("error_label", "Subscriber error"))
+    if mode == "pooled":
+        return PooledDispatcher(**options)
+    raise ValueError(f"Unknown dispatch mode: {mode}")
@@ -0,0 +1,355 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process append lock
+    fcntl = None
+
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_INTERVAL = 64  # Sparse index checkpoint every N records
+
+
+class SegmentedEventLog:
+    """Append-only JSON-lines log split into size-bounded segment files.
+
+    Every record is stamped with a monotonically increasing ``offset``.
+    Segments are named after the offset of their first record, so readers
+    find any offset with a bisect over segment names plus a sparse index of
+    byte positions. Appends are O(1); the oldest segments are deleted once
+    more than ``retention_segments`` exist. With ``retention_segments=None``
+    nothing is deleted on append and only ``compact`` frees space, so
+    records a consumer has not committed yet are never lost.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 1024 * 1024, retention_segments: Optional[int] = 8):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.retention_segments = None if retention_segments is None else max(1, retention_segments)
+        self._lock = threading.RLock()
+        self._appended = threading.Condition(self._lock)
+        self._segments: List[int] = []
+        self._index: Dict[int, List[Tuple[int, int]]] = {}  # base -> [(offset, byte_pos)]
+        self._tail_base: Optional[int] = None
+        self._tail_position = 0
+        self._next_offset = 0
+        self._active = None
+        self._active_base: Optional[int] = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_path = os.path.join(self.directory, ".lock")
+        self._consumer_dir = os.path.join(self.directory, "consumers")
+        with self._lock:
+            self._refresh()
+
+    # --- Public API ---
+
+    @property
+    def first_offset(self) -> int:
+        """Oldest offset still retained on disk."""
+        with self._lock:
+            self._refresh_if_changed()
+            return self._segments[0] if self._segments else self._next_offset
+
+    @property
+    def next_offset(self) -> int:
+        """Offset the next appended record will receive."""
+        with self._lock:
+            self._refresh_if_changed()
+            return self._next_offset
+
+    def append(self, record: dict) -> int:
+        """Stamp ``record`` with the next offset and append it to the log."""
+        return self.append_many([record])[0]
+
+    def append_many(self, records: List[dict]) -> List[int]:
+        """Append several records under one lock acquisition and one flush."""
+        with self._lock, self._file_lock():
+            self._refresh_if_changed()
+            self._discard_partial_tail()
+
+            offsets = []
+            for record in records:
+                offset = self._next_offset
+                record["offset"] = offset
+                line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+                if self._tail_base is None or (
+                    self._tail_position > 0 and self._tail_position + len(line) > self.segment_bytes
+                ):
+                    self._roll(offset)
+
+                self._active_file().write(line)
+                if offset % INDEX_INTERVAL == 0:
+                    self._add_checkpoint(self._tail_base, offset, self._tail_position)
+                self._tail_position += len(line)
+                self._next_offset = offset + 1
+                offsets.append(offset)
+
+            if self._active is not None:
+                self._active.flush()
+            if offsets:
+                self._appended.notify_all()
+            return offsets
+
+    def read(self, offset: int, limit: Optional[int] = None) -> List[dict]:
+        """Return records with ``offset >= offset``, oldest first."""
+        with self._lock:
+            self._refresh_if_changed()
+            if not self._segments or offset >= self._next_offset:
+                return []
+            offset = max(offset, self._segments[0])
+            records = []
+            start = bisect.bisect_right(self._segments, offset) - 1
+            for base in self._segments[start:]:
+                remaining = None if limit is None else limit - len(records)
+                records.extend(self._read_segment(base, offset, remaining))
+                if limit is not None and len(records) >= limit:
+                    break
+            return records
+
+    def wait_for(self, offset: int, timeout: Optional[float] = None, poll_interval: float = 0.1) -> bool:
+        """Block until a record at ``offset`` exists or ``timeout`` expires.
+
+        Appends from this process wake waiters immediately; appends from
+        other processes are noticed by a cheap size check every
+        ``poll_interval`` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._appended:
+            while True:
+                self._refresh_if_changed()
+                if self._next_offset > offset:
+                    return True
+                wait = poll_interval
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._appended.wait(wait)
+
+    def committed(self, group: str) -> Optional[int]:
+        """Return the committed offset for a consumer group, if any."""
+        try:
+            with open(os.path.join(self._consumer_dir, f"{group}.offset"), "r") as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def commit(self, group: str, offset: int):
+        """Persist the next offset a consumer group should read."""
+        os.makedirs(self._consumer_dir, exist_ok=True)
+        path = os.path.join(self._consumer_dir, f"{group}.offset")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def consumer_lock(self, group: str):
+        """Hold a group's cross-process lock around a read/process/commit cycle.
+
+        Without it, two processes consuming as the same group can read the
+        same committed offset and both handle the records after it.
+        """
+        os.makedirs(self._consumer_dir, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._consumer_dir, f"{group}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def compact(self, before: int) -> int:
+        """Delete whole segments holding only offsets below ``before``.
+
+        Consumers call this with their committed offset to drop records
+        they have finished with. The active segment is never removed.
+        Returns the number of segments deleted.
+        """
+        with self._lock, self._file_lock():
+            self._refresh_if_changed()
+            removed = 0
+            while len(self._segments) > 1 and self._segments[1] <= before:
+                self._remove_segment(self._segments.pop(0))
+                removed += 1
+            return removed
+
+    def tail(self, count: int) -> List[dict]:
+        """Return the last ``count`` retained records."""
+        if count <= 0:
+            return []
+        return self.read(max(0, self.next_offset - count))
+
+    def close(self):
+        """Close the active segment handle."""
+        with self._lock:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+                self._active_base = None
+
+    # --- Segment management ---
+
+    def _segment_path(self, base: int) -> str:
+        return os.path.join(self.directory, f"{base:020d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        bases = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SEGMENT_SUFFIX):
+                try:
+                    bases.append(int(name[:-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(bases)
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize appends across processes sharing the log directory."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _active_file(self):
+        if self._active is None or self._active_base != self._tail_base:
+            if self._active is not None:
+                self._active.close()
+            self._active = open(self._segment_path(self._tail_base), "ab")
+            self._active_base = self._tail_base
+        return self._active
+
+    def _roll(self, base: int):
+        """Start a new segment at ``base`` and enforce retention."""
+        open(self._segment_path(base), "ab").close()
+        self._segments.append(base)
+        self._tail_base = base
+        self._tail_position = 0
+        while self.retention_segments is not None and len(self._segments) > self.retention_segments:
+            self._remove_segment(self._segments.pop(0))
+
+    def _remove_segment(self, base: int):
+        self._index.pop(base, None)
+        try:
+            os.remove(self._segment_path(base))
+        except FileNotFoundError:
+            pass
+
+    def _refresh_if_changed(self):
+        """Cheap check for appends or rollovers made by other processes."""
+        if self._tail_base is None:
+            if self._list_segments():
+                self._refresh()
+            return
+        try:
+            size = os.path.getsize(self._segment_path(self._tail_base))
+        except FileNotFoundError:
+            size = -1
+        if size != self._tail_position or os.path.exists(self._segment_path(self._next_offset)):
+            self._refresh()
+
+    def _refresh(self):
+        """Re-list segments and scan any bytes appended to the last one."""
+        self._segments = self._list_segments()
+        for base in list(self._index):
+            if base not in self._segments:
+                del self._index[base]
+        if not self._segments:
+            self._tail_base = None
+            self._tail_position = 0
+            return
+
+        last = self._segments[-1]
+        if self._tail_base == last:
+            offset, position = self._next_offset, self._tail_position
+        else:
+            offset, position = last, 0
+        for offset, position, _ in self._scan(last, offset, position):
+            pass
+        self._tail_base = last
+        self._tail_position = position
+        self._next_offset = offset
+
+    def _discard_partial_tail(self):
+        """Drop a torn final line left by a writer that crashed mid-append."""
+        if self._tail_base is None:
+            return
+        path = self._segment_path(self._tail_base)
+        if os.path.getsize(path) > self._tail_position:
+            if self._active is not None and self._active_base == self._tail_base:
+                self._active.close()
+                self._active = None
+            with open(path, "r+b") as f:
+                f.truncate(self._tail_position)
+
+    # --- Reading ---
+
+    def _add_checkpoint(self, base: int, offset: int, position: int):
+        points = self._index.setdefault(base, [])
+        i = bisect.bisect_left(points, (offset, position))
+        if i == len(points) or points[i][0] != offset:
+            points.insert(i, (offset, position))
+
+    def _seek_point(self, base: int, offset: int) -> Tuple[int, int]:
+        """Closest known (offset, byte_pos) at or before ``offset``."""
+        points = self._index.get(base, [])
+        i = bisect.bisect_right(points, (offset, float("inf"))) - 1
+        return points[i] if i >= 0 else (base, 0)
+
+    def _scan(self, base: int, offset: int, position: int) -> Iterator[Tuple[int, int, bytes]]:
+        """Walk complete lines from a known position.
+
+        Yields ``(next_offset, next_position, line)`` after each record and
+        records sparse checkpoints on the way. A partial trailing line (an
+        append still in flight) is left for the next scan.
+        """
+        try:
+            f = open(self._segment_path(base), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if offset % INDEX_INTERVAL == 0:
+                    self._add_checkpoint(base, offset, position)
+                offset += 1
+                position += len(line)
+                yield offset, position, line
+
+    def _read_segment(self, base: int, offset: int, limit: Optional[int] = None) -> List[dict]:
+        """Parse records from one segment, remembering where the read stopped.
+
+        The stop position is added to the sparse index so a cursor resuming
+        at the returned offset seeks straight to it instead of rescanning.
+        """
+        records = []
+        current, position = self._seek_point(base, offset)
+        for current, position, line in self._scan(base, current, position):
+            if current - 1 < offset:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+            if limit is not None and len(records) >= limit:
+                break
+        if current > offset:
+            self._add_checkpoint(base, current, position)
+        return records
@@ -0,0 +1,45 @@
+import os
+import random
+import threading
+import time
+
+
+class MessageIdGenerator:
+    """Time-sortable, collision-free message IDs (snowflake style).
+
+    Each ID is ``<prefix>_`` followed by fixed-width hex fields:
+    48-bit millisecond timestamp, 16-bit sequence within that millisecond
+    and a 24-bit node tag chosen per process. Fixed width means IDs sort
+    lexicographically in creation order; the node tag keeps processes that
+    share a store from colliding. The clock never runs backwards: if the
+    wall clock does, or a millisecond's sequence is exhausted, the
+    timestamp field is advanced instead.
+    """
+
+    def __init__(self, prefix: str = "msg"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._node = random.SystemRandom().getrandbits(24)
+        self._last_ms = 0
+        self._sequence = 0
+
+    def __call__(self) -> str:
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                self._sequence += 1
+                if self._sequence > 0xFFFF:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return f"{self.prefix}_{self._last_ms:012x}{self._sequence:04x}{self._node:06x}"
+
+
+new_message_id = MessageIdGenerator()
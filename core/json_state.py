@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+
+_UNCHECKED = object()
+
+
+class StaleStateError(RuntimeError):
+    """The file changed since the version the caller read."""
+
+
+class JsonStateFile:
+    """A JSON document shared by several processes.
+
+    Writers take an ``fcntl`` advisory lock on ``<path>.lock`` and replace
+    the file atomically (temp file + rename), so readers never see a
+    partial write and need no lock. ``update`` does a locked
+    read-modify-write; ``write`` can instead check an ``expected_version``
+    obtained from ``read_versioned``. The version is the file's
+    (inode, mtime, size), which every rename changes, so the on-disk
+    format stays plain JSON.
+    """
+
+    def __init__(self, path: str, default: Callable[[], Any] = list, indent: Optional[int] = 2):
+        self.path = path
+        self.default = default
+        self.indent = indent
+        self._lock_path = f"{path}.lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def version(self) -> Optional[Tuple[int, int, int]]:
+        """Current on-disk version, or None if the file does not exist."""
+        try:
+            stat = os.stat(self.path)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def read(self) -> Any:
+        return self.read_versioned()[0]
+
+    def read_versioned(self) -> Tuple[Any, Optional[Tuple[int, int, int]]]:
+        """Return ``(data, version)``; a missing or corrupt file reads as ``default()``."""
+        data, version, _ = self._load()
+        return data, version
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                stat = os.fstat(f.fileno())
+                version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                try:
+                    return json.load(f), version, True
+                except ValueError:
+                    return self.default(), version, False
+        except FileNotFoundError:
+            return self.default(), None, False
+
+    @contextmanager
+    def locked(self):
+        """Hold the writer lock; re-entrant within a process."""
+        with self._thread_lock:
+            self._depth += 1
+            try:
+                if self._depth > 1 or fcntl is None:
+                    yield
+                    return
+                with open(self._lock_path, "a") as lock_file:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._depth -= 1
+
+    def write(self, data: Any, expected_version=_UNCHECKED) -> Optional[Tuple[int, int, int]]:
+        """Atomically replace the file; returns the new version.
+
+        If ``expected_version`` is given (None meaning "file must not
+        exist"), raise ``StaleStateError`` when the file has changed since.
+        """
+        with self.locked():
+            if expected_version is not _UNCHECKED and self.version() != expected_version:
+                raise StaleStateError(f"{self.path} changed since it was read")
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                # indent=None means compact output with no whitespace at all
+                separators = None if self.indent is not None else (",", ":")
+                json.dump(data, f, indent=self.indent, separators=separators, default=str)
+            os.replace(tmp_path, self.path)
+            return self.version()
+
+    def update(self, mutate: Callable[[Any], Any]) -> Any:
+        """Locked read-modify-write; ``mutate`` gets the current data and returns the new data."""
+        with self.locked():
+            data = mutate(self.read())
+            self.write(data)
+            return data
+
+    def ensure(self):
+        """Create the file with ``default()`` if it is missing or corrupt."""
+        with self.locked():
+            if not self._load()[2]:
+                self.write(self.default())
@@ -48,8 +48,14 @@ class AgentLogger:
         """Log debug message with optional context."""
         self._log_with_context(logging.DEBUG, message, **kwargs)
     
+    def is_enabled(self, level: int) -> bool:
+        """Whether a message at ``level`` would be emitted."""
+        return self.logger.isEnabledFor(level)
+    
     def _log_with_context(self, level: int, message: str, **kwargs):
         """Log message with optional context data."""
+        if not self.logger.isEnabledFor(level):
+            return
         if kwargs:
             context = " | ".join([f"{k}={v}" for k, v in kwargs.items()])
             message = f"{message} | {context}"
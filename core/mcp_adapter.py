@@ -1,24 +1,68 @@
+import functools
 import json
+import threading
 import time
+from config import MCP_FORWARDER
+from core.coalescer import CoalescingForwarder
 from core.sovereign_bus import bus
 
+def superseded_key(item):
+    """Collapse key for forwarded events: rl.learned is superseded per (state, action)."""
+    content = item["content"]
+    if content["event_type"] != "rl.learned":
+        return None
+    data = content["data"]
+    if "state" not in data or "action" not in data:
+        return None
+    return item["receiver"], str(data["state"]), str(data["action"])
+
 class MCPAdapter:
-    """Adapter for Ritesh's MCP Manager integration."""
+    """Adapter for Ritesh's MCP Manager integration.
+
+    Bus events are coalesced for up to ``MCP_FORWARDER["max_delay"]``
+    seconds and sent with one ``send_messages`` write per batch.
+
+    Incoming messages for ``agent_name`` are read from the manager's
+    durable per-receiver cursor, so a poll only touches new messages and
+    a restart resumes where the last run stopped. Each batch is marked
+    processed in one write once published; already processed ones are
+    skipped, so a crash before the cursor is saved does not publish them
+    twice. Messages that cannot be published are logged and skipped.
+    """
     
-    def __init__(self, mcp_manager, agent_name="sovereign_bus"):
+    EVENTS = ["deploy.*", "issue.*", "heal.*", "system.*", "rl.learned"]
+
+    def __init__(self, mcp_manager, agent_name="sovereign_bus", forwarder_options=None, batch_size=100):
         self.mcp_manager = mcp_manager
         self.agent_name = agent_name
-        self.last_check = time.time()
+        self.batch_size = batch_size
+        self._process_lock = threading.Lock()
+        self._poller = None
+        self._poller_stop = threading.Event()
+        options = dict(MCP_FORWARDER, **(forwarder_options or {}))
+        self.forwarder = CoalescingForwarder(
+            functools.partial(self.mcp_manager.send_messages, raise_errors=True),  # Failed writes are retried
+            max_delay=options["max_delay"],
+            max_batch=options["max_batch"],
+            collapse_key=superseded_key if options["collapse_superseded"] else None,
+            name="mcp-forwarder",
+        )
         self._setup_bus_listeners()
     
     def _setup_bus_listeners(self):
         """Subscribe to bus events and forward to MCP."""
-        events = ["deploy.success", "deploy.failure", "issue.detected", "heal.triggered", "rl.learned"]
-        for event in events:
+        for event in self.EVENTS:
             bus.subscribe(event, self._forward_to_mcp)
+
+    def close(self):
+        """Stop polling and forwarding, and write any pending batch."""
+        self.stop_polling()
+        for event in self.EVENTS:
+            bus.unsubscribe(event, self._forward_to_mcp)
+        self.forwarder.close()
     
     def _forward_to_mcp(self, message):
-        """Forward bus message to MCP system."""
+        """Queue a bus message for the next batched write to the MCP system."""
         mcp_content = {
             "event_type": message["event_type"],
             "data": message.get("data", {}),
@@ -26,27 +70,100 @@ class MCPAdapter:
         }
         
         # Send to MCP using Ritesh's format
-        self.mcp_manager.send_message(
-            sender=self.agent_name,
-            receiver="mcp_agents", 
-            content=mcp_content
-        )
+        self.forwarder.submit({
+            "sender": self.agent_name,
+            "receiver": "mcp_agents",
+            "content": mcp_content
+        })
+
+    def get_forwarding_stats(self):
+        """Batch sizes, flush latency and collapse counts for forwarded events."""
+        return self.forwarder.stats()
     
     def process_mcp_messages(self):
-        """Check for new MCP messages and forward to bus."""
-        messages = self.mcp_manager.read_messages(self.agent_name)
-        
-        for msg in messages:
-            if msg["timestamp"] > self.last_check:
-                # Convert MCP message to bus event
-                content = msg["content"]
-                event_type = content.get("event_type", "mcp.message")
-                data = content.get("data", {})
-                data["mcp_sender"] = msg["sender"]
-                
-                bus.publish(event_type, data)
-        
-        self.last_check = time.time()
+        """Publish all new MCP messages to the bus, ``batch_size`` at a time; returns how many were published."""
+        total = 0
+        while True:
+            read, published = self._process_batch()
+            total += published
+            if read < self.batch_size:
+                return total
+
+    @staticmethod
+    def message_error(msg):
+        """Why ``msg`` cannot be published to the bus, or None if it can."""
+        content = msg["content"]
+        if not isinstance(content, dict):
+            return "content must be an object"
+        if not isinstance(content.get("data", {}), dict):
+            return "content data must be an object"
+        return None
+
+    def _process_batch(self):
+        """Returns ``(messages read, messages published)``."""
+        with self._process_lock:
+            cursor = self.mcp_manager.get_cursor(self.agent_name)
+            messages, next_cursor = self.mcp_manager.read_messages_since(self.agent_name, cursor, self.batch_size)
+            handled = []
+            published = 0
+            try:
+                for msg in messages:
+                    if not msg["processed"]:
+                        error = self.message_error(msg)
+                        if error:
+                            print(f"MCP Adapter skipped message {msg['id']}: {error}")
+                        else:
+                            # Convert MCP message to bus event
+                            content = msg["content"]
+                            event_type = content.get("event_type", "mcp.message")
+                            data = content.get("data", {})
+                            data["mcp_sender"] = msg["sender"]
+
+                            bus.publish(event_type, data)
+                            published += 1
+                        handled.append(msg["id"])
+                    cursor = msg["seq"]
+            finally:
+                if handled:
+                    self.mcp_manager.mark_processed_many(handled)  # Acknowledge the batch in one write
+                if messages:
+                    self.mcp_manager.commit_cursor(self.agent_name, cursor)
+            return len(messages), published
+
+    def start_polling(self, min_interval=0.05, max_interval=2.0):
+        """Poll for MCP messages on a background thread.
+
+        A full batch is followed by an immediate re-poll; otherwise the
+        interval resets to ``min_interval`` after any traffic and doubles
+        while idle, up to ``max_interval``.
+        """
+        if self._poller is not None:
+            return
+        self._poller_stop.clear()
+        self._poller = threading.Thread(
+            target=self._poll_loop, args=(min_interval, max_interval), name="mcp-adapter-poller", daemon=True
+        )
+        self._poller.start()
+
+    def _poll_loop(self, min_interval, max_interval):
+        interval = min_interval
+        while not self._poller_stop.is_set():
+            try:
+                read, _ = self._process_batch()
+            except Exception as e:
+                print(f"MCP Adapter error: {e}")
+                read = 0
+            if read >= self.batch_size:
+                continue  # Backlog: go again straight away
+            interval = min_interval if read else min(interval * 2, max_interval)
+            self._poller_stop.wait(interval)
+
+    def stop_polling(self):
+        """Stop the background poller, if running."""
+        self._poller_stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=5.0)
+            self._poller = None
     
     def send_to_mcp(self, receiver, event_type, data):
         """Send message to specific MCP agent."""
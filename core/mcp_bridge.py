@@ -1,33 +1,99 @@
-import json
-import os
+import random
+import threading
+import time
 from datetime import datetime
+from core.event_log import SegmentedEventLog
+from core.json_state import JsonStateFile
+from core.mcp_outbox import BufferedOutbox
 from core.sovereign_bus import bus
 
 class MCPBridge:
-    """Bridge between MCP agents and sovereign bus."""
-    
-    def __init__(self, inbox_path="mcp_inbox.json", outbox_path="mcp_outbox.json"):
-        self.inbox_path = inbox_path
+    """Bridge between MCP agents and sovereign bus.
+
+    Inbound MCP messages are appended to a segmented log under
+    ``inbox_dir``. ``process_mcp_inbox`` reads from the bridge's committed
+    offset, so each call only parses messages that arrived since the last
+    one, and segments that are fully processed are deleted every
+    ``compact_interval`` seconds.
+
+    Outbound messages go to an in-memory ring buffer of the last
+    ``outbox_size`` messages, written to ``outbox_path`` in the background.
+    """
+
+    EVENTS = ["deploy.*", "issue.*", "heal.*", "system.*", "rl.learned"]
+    CONSUMER_GROUP = "bridge"
+
+    def __init__(self, inbox_path="mcp_inbox.json", outbox_path="mcp_outbox.json", inbox_dir="mcp_inbox",
+                 inbox_segment_bytes=256 * 1024, compact_interval=60.0, batch_size=500,
+                 outbox_size=100, outbox_flush_interval=1.0, outbox_flush_every=50):
+        self.inbox_path = inbox_path  # Legacy single-file inbox, imported once
         self.outbox_path = outbox_path
-        self._setup_endpoints()
+        self.compact_interval = compact_interval
+        self.batch_size = batch_size
+        # Unbounded: only _maybe_compact frees segments, and never past the committed offset
+        self.inbox = SegmentedEventLog(inbox_dir, inbox_segment_bytes, retention_segments=None)
+        self._last_compaction = time.monotonic()
+        self._process_lock = threading.Lock()
+        self._worker = None
+        self._worker_stop = threading.Event()
+        self.outbox = BufferedOutbox(outbox_path, outbox_size, outbox_flush_interval, outbox_flush_every)
+        self._import_legacy_inbox()
         self._setup_bus_listeners()
     
-    def _setup_endpoints(self):
-        """Initialize JSON endpoints."""
-        for path in [self.inbox_path, self.outbox_path]:
-            if not os.path.exists(path):
-                with open(path, 'w') as f:
-                    json.dump([], f)
+    def _import_legacy_inbox(self):
+        """Move unprocessed messages from the old JSON inbox into an empty log."""
+        if not self.inbox_path or self.inbox.next_offset > 0:
+            return
+        for message in JsonStateFile(self.inbox_path).read():
+            if not message.get("processed"):
+                self.inbox.append(message)
     
     def _setup_bus_listeners(self):
         """Subscribe to bus events and forward to MCP."""
-        events = ["deploy.success", "deploy.failure", "issue.detected", "heal.triggered", "rl.learned"]
-        for event in events:
+        for event in self.EVENTS:
             bus.subscribe(event, self._forward_to_mcp)
+
+    def start_inbox_worker(self, poll_interval=1.0):
+        """Process the inbox on a background thread as messages arrive.
+
+        Lets callers such as the HTTP endpoint return right after
+        ``add_inbox_message``. Appends from this process wake the worker at
+        once; other processes' appends are seen within ``poll_interval``.
+        """
+        if self._worker is not None:
+            return
+        self._worker_stop.clear()
+        self._worker = threading.Thread(
+            target=self._run_inbox_worker, args=(poll_interval,), name="mcp-inbox", daemon=True
+        )
+        self._worker.start()
+
+    def _run_inbox_worker(self, poll_interval):
+        while not self._worker_stop.is_set():
+            offset = self.inbox.committed(self.CONSUMER_GROUP)
+            if offset is None:
+                offset = self.inbox.first_offset
+            if self.inbox.wait_for(offset, timeout=poll_interval, poll_interval=poll_interval):
+                if not self.process_mcp_inbox():
+                    self._worker_stop.wait(poll_interval)  # Back off instead of spinning on a failing message
+
+    def stop_inbox_worker(self):
+        """Stop the background inbox worker, if running."""
+        self._worker_stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5.0)
+            self._worker = None
+
+    def close(self):
+        """Stop forwarding bus events, flush the outbox and release the inbox log."""
+        self.stop_inbox_worker()
+        for event in self.EVENTS:
+            bus.unsubscribe(event, self._forward_to_mcp)
+        self.outbox.close()
+        self.inbox.close()
     
     def _forward_to_mcp(self, message):
-        """Forward bus message to MCP outbox."""
-        import random
+        """Forward bus message to the MCP outbox buffer."""
         mcp_message = {
             "context_id": f"ctx_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(100,999)}",
             "timestamp": message["timestamp"],
@@ -35,64 +101,82 @@ class MCPBridge:
             "payload": message.get("data", {}),
             "source": "sovereign_bus"
         }
-        
-        # Append to outbox
-        try:
-            with open(self.outbox_path, 'r') as f:
-                messages = json.load(f)
-        except:
-            messages = []
-        
-        messages.append(mcp_message)
-        
-        with open(self.outbox_path, 'w') as f:
-            json.dump(messages[-100:], f, indent=2)  # Keep last 100
+        self.outbox.append(mcp_message)
     
+    @staticmethod
+    def message_error(message):
+        """Why ``message`` cannot be published, or None if it can."""
+        if not isinstance(message, dict):
+            return "expected a JSON object"
+        if not isinstance(message.get("payload", {}), dict):
+            return "payload must be a JSON object"
+        return None
+
     def process_mcp_inbox(self):
-        """Process messages from MCP and publish to bus."""
+        """Publish inbox messages that arrived since the last call.
+
+        The committed offset advances past each published message, so a
+        failure part-way through resumes after the last success. Messages
+        that can never be published (see ``message_error``) are logged and
+        skipped rather than blocking the ones behind them. Returns the
+        number of messages published.
+        """
+        # The inbox worker and direct callers may overlap, here and in other processes
+        with self._process_lock, self.inbox.consumer_lock(self.CONSUMER_GROUP):
+            return self._process_inbox()
+
+    def _process_inbox(self):
+        offset = self.inbox.committed(self.CONSUMER_GROUP)
+        if offset is None:
+            offset = self.inbox.first_offset
+        start = offset
+        published = 0
         try:
-            with open(self.inbox_path, 'r') as f:
-                messages = json.load(f)
-            
-            for msg in messages:
-                if msg.get("processed"):
-                    continue
-                
-                # Translate MCP message to bus event
-                event_type = msg.get("event_type", "mcp.message")
-                data = msg.get("payload", {})
-                data["mcp_context_id"] = msg.get("context_id")
-                
-                bus.publish(event_type, data)
-                msg["processed"] = True
-            
-            # Update inbox with processed flags
-            with open(self.inbox_path, 'w') as f:
-                json.dump(messages, f, indent=2)
-                
+            while True:
+                messages = self.inbox.read(offset, self.batch_size)
+                if not messages:
+                    break
+                for msg in messages:
+                    error = self.message_error(msg)
+                    if error:
+                        print(f"MCP Bridge skipped inbox message {msg['offset']}: {error}")
+                        offset = msg["offset"] + 1
+                        continue
+
+                    # Translate MCP message to bus event
+                    event_type = msg.get("event_type", "mcp.message")
+                    data = msg.get("payload", {})
+                    data["mcp_context_id"] = msg.get("context_id")
+
+                    bus.publish(event_type, data)
+                    offset = msg["offset"] + 1
+                    published += 1
         except Exception as e:
             print(f"MCP Bridge error: {e}")
+        finally:
+            if offset != start:
+                self.inbox.commit(self.CONSUMER_GROUP, offset)
+        self._maybe_compact(offset)
+        return published
+
+    def _maybe_compact(self, offset):
+        """Drop fully processed inbox segments at most every ``compact_interval`` seconds."""
+        now = time.monotonic()
+        if now - self._last_compaction >= self.compact_interval:
+            self._last_compaction = now
+            self.inbox.compact(offset)
     
     def get_outbox_messages(self):
-        """Get messages for MCP consumption."""
-        try:
-            with open(self.outbox_path, 'r') as f:
-                return json.load(f)
-        except:
-            return []
+        """Get messages for MCP consumption, straight from memory."""
+        return self.outbox.snapshot()
     
     def add_inbox_message(self, message):
-        """Add message from MCP to inbox."""
-        try:
-            with open(self.inbox_path, 'r') as f:
-                messages = json.load(f)
-        except:
-            messages = []
-        
-        messages.append(message)
-        
-        with open(self.inbox_path, 'w') as f:
-            json.dump(messages, f, indent=2)
+        """Append a message from MCP to the inbox log; returns its offset."""
+        return self.inbox.append(dict(message))
+
+    def add_inbox_messages(self, messages):
+        """Append several MCP messages in one locked write; returns their offsets."""
+        return self.inbox.append_many([dict(message) for message in messages])
 
 # Global bridge instance
 mcp_bridge = MCPBridge()
\ No newline at end of file
@@ -1,38 +1,22 @@
-import json
-import os
 import time
 from datetime import datetime
+from core.ids import new_message_id
+from core.mcp_storage import open_message_store
 
 class MCPManager:
-    def __init__(self, message_file="messages.json"):
+    def __init__(self, message_file="messages.json", backend=None):
+        """Message store for agents.
+
+        ``backend`` is "json" (single rewritten file) or "sqlite" (indexed
+        WAL database); by default it follows the file extension, so
+        ``MCPManager("mcp_messages.db")`` uses SQLite.
+        """
         self.message_file = message_file
-        self._ensure_file_exists()
-    
-    def _ensure_file_exists(self):
-        """Ensure message file exists and is valid JSON."""
-        try:
-            if not os.path.exists(self.message_file):
-                with open(self.message_file, "w") as f:
-                    json.dump([], f)
-            else:
-                # Validate existing file
-                with open(self.message_file, "r") as f:
-                    json.load(f)
-        except (json.JSONDecodeError, IOError):
-            # Fix corrupted file
-            with open(self.message_file, "w") as f:
-                json.dump([], f)
-
-    def send_message(self, sender, receiver, content):
-        """Send a message to another agent"""
-        try:
-            with open(self.message_file, "r") as f:
-                messages = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            messages = []
-        
-        message = {
-            "id": f"msg_{int(time.time() * 1000)}",  # Unique message ID
+        self.store = open_message_store(message_file, backend)
+
+    def _build_message(self, sender, receiver, content, message_id=None):
+        return {
+            "id": message_id or new_message_id(),  # Time-sortable, unique across threads and processes
             "sender": sender,
             "receiver": receiver,
             "content": content,
@@ -40,87 +24,85 @@ class MCPManager:
             "iso_timestamp": datetime.now().isoformat(),
             "processed": False
         }
-        
-        messages.append(message)
-        
-        # Keep only last 1000 messages to prevent file bloat
-        if len(messages) > 1000:
-            messages = messages[-1000:]
-        
-        try:
-            with open(self.message_file, "w") as f:
-                json.dump(messages, f, indent=2)
-        except IOError as e:
-            print(f"MCP Manager: Error writing messages - {e}")
+
+    def send_message(self, sender, receiver, content, message_id=None):
+        """Send a message to another agent.
+
+        Passing an explicit ``message_id`` makes the send idempotent: a
+        message whose ID is already stored is not written again.
+        """
+        message = self._build_message(sender, receiver, content, message_id)
+        self.store.append(message)
+        return message["id"]
+
+    def send_messages(self, batch, raise_errors=False):
+        """Send many messages in one write.
+
+        ``batch`` is an iterable of dicts with ``sender``, ``receiver`` and
+        ``content`` keys and an optional ``id``. Returns the message IDs in order.
+        Write errors are logged, or raised with ``raise_errors=True`` so
+        callers can retry.
+        """
+        messages = [self._build_message(m["sender"], m["receiver"], m["content"], m.get("id")) for m in batch]
+        if messages:
+            self.store.append_many(messages, raise_errors=raise_errors)
+        return [message["id"] for message in messages]
 
     def read_messages(self, receiver):
         """Read messages for a specific receiver"""
-        try:
-            with open(self.message_file, "r") as f:
-                messages = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
-        
-        inbox = [msg for msg in messages if msg["receiver"] == receiver]
-        return inbox
-    
+        return self.store.read(receiver)
+
+    def read_messages_since(self, receiver, cursor=0, limit=None):
+        """Read a receiver's messages after ``cursor``.
+
+        Only that receiver's partition is scanned. Returns
+        ``(messages, next_cursor)``; pass ``next_cursor`` back to continue.
+        """
+        return self.store.read_since(receiver, cursor, limit)
+
+    def read_new_messages(self, receiver, limit=None):
+        """Read messages since the receiver's stored cursor and advance it."""
+        messages, cursor = self.store.read_since(receiver, self.store.get_cursor(receiver), limit)
+        if messages:
+            self.store.commit_cursor(receiver, cursor)
+        return messages
+
+    def get_cursor(self, receiver):
+        """Return the receiver's stored read cursor (0 when it has read nothing)."""
+        return self.store.get_cursor(receiver)
+
+    def commit_cursor(self, receiver, cursor):
+        """Persist the receiver's read cursor."""
+        self.store.commit_cursor(receiver, cursor)
+
+    def get_message(self, message_id):
+        """Look up one message by ID, or None."""
+        return self.store.get(message_id)
+
     def read_unprocessed_messages(self, receiver):
         """Read only unprocessed messages for a receiver."""
-        messages = self.read_messages(receiver)
-        return [msg for msg in messages if not msg.get("processed", False)]
-    
+        return self.store.read(receiver, unprocessed_only=True)
+
     def mark_processed(self, message_id):
         """Mark a message as processed."""
-        try:
-            with open(self.message_file, "r") as f:
-                messages = json.load(f)
-            
-            for msg in messages:
-                if msg.get("id") == message_id:
-                    msg["processed"] = True
-                    break
-            
-            with open(self.message_file, "w") as f:
-                json.dump(messages, f, indent=2)
-        except (json.JSONDecodeError, FileNotFoundError, IOError):
-            pass
-    
+        self.store.mark_processed(message_id)
+
+    def mark_processed_many(self, message_ids):
+        """Mark several messages as processed in one write; returns how many changed."""
+        return self.store.mark_processed_many(message_ids)
+
+    def claim_unprocessed(self, receiver, limit=None):
+        """Atomically fetch up to ``limit`` unprocessed messages and mark them processed."""
+        return self.store.claim(receiver, limit)
+
     def get_message_stats(self):
         """Get message statistics."""
-        try:
-            with open(self.message_file, "r") as f:
-                messages = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {"total": 0, "processed": 0, "unprocessed": 0}
-        
-        total = len(messages)
-        processed = len([msg for msg in messages if msg.get("processed", False)])
-        
-        return {
-            "total": total,
-            "processed": processed,
-            "unprocessed": total - processed
-        }
+        return self.store.stats()
 
     def clear_messages(self):
         """Clear all messages"""
-        try:
-            with open(self.message_file, "w") as f:
-                json.dump([], f)
-        except IOError as e:
-            print(f"MCP Manager: Error clearing messages - {e}")
-    
+        self.store.clear()
+
     def clear_processed_messages(self):
         """Clear only processed messages to save space."""
-        try:
-            with open(self.message_file, "r") as f:
-                messages = json.load(f)
-            
-            # Keep only unprocessed messages
-            unprocessed = [msg for msg in messages if not msg.get("processed", False)]
-            
-            with open(self.message_file, "w") as f:
-                json.dump(unprocessed, f, indent=2)
-                
-        except (json.JSONDecodeError, FileNotFoundError, IOError) as e:
-            print(f"MCP Manager: Error clearing processed messages - {e}")
\ No newline at end of file
+        self.store.clear_processed()
@@ -0,0 +1,191 @@
+import atexit
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
+from core.json_state import JsonStateFile, StaleStateError
+
+
+def _number(messages: List[Dict]) -> int:
+    """Fill in missing offsets in order; returns the offset after the last message."""
+    offset = 0
+    for message in messages:
+        # Entries written before offsets existed are numbered in order
+        offset = message.setdefault("offset", offset) + 1
+    return offset
+
+
+class BufferedOutbox:
+    """In-memory ring buffer of outbound MCP messages with write-behind.
+
+    ``append`` only touches memory. A background thread writes the buffer
+    to ``path`` every ``flush_interval`` seconds, or sooner once
+    ``flush_every`` messages are pending. Writes go through
+    ``JsonStateFile``, so readers never see a half-written file.
+
+    Every message is stamped with an increasing ``offset`` so consumers can
+    page with ``read_since`` and block in ``wait`` for newer messages.
+
+    Reads serve from memory; when another process has replaced the file
+    and nothing is pending locally, the buffer is reloaded first, so a
+    separate endpoint process still sees the main process's messages.
+    Writes are checked against the version last seen; if another process
+    wrote in between, its messages are kept and the local ones are
+    appended after them with fresh offsets.
+    """
+
+    def __init__(self, path: str, capacity: int = 100, flush_interval: float = 1.0, flush_every: int = 50):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.state = JsonStateFile(path, indent=None)  # Compact: machine-read, rewritten often
+        self._stamp = None
+        self._messages = deque(maxlen=capacity)
+        self._next_offset = 0
+        self.state.ensure()  # Before reading the version, so the first flush is not seen as stale
+        self._reload()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        atexit.register(self.close)
+
+    def _reload(self):
+        messages, self._stamp = self.state.read_versioned()
+        offset = _number(messages)
+        self._messages = deque(messages, maxlen=self.capacity)
+        self._next_offset = max(self._next_offset, offset)
+
+    def _refresh(self):
+        """Pick up a file written by another process; caller holds ``_lock``."""
+        if not self._pending and self.state.version() != self._stamp:
+            previous = self._next_offset
+            self._reload()
+            if self._next_offset != previous:
+                self._changed.notify_all()
+
+    def append(self, message: Dict):
+        with self._lock:
+            message["offset"] = self._next_offset
+            self._next_offset += 1
+            self._messages.append(message)
+            self._pending += 1
+            flush_now = self.flush_every and self._pending >= self.flush_every
+            self._changed.notify_all()
+
+        if self._thread is None:
+            self._start()
+        if flush_now:
+            self._wake.set()
+
+    def snapshot(self) -> List[Dict]:
+        """Current buffer contents, oldest first."""
+        with self._lock:
+            self._refresh()
+            return list(self._messages)
+
+    def read_since(self, since: Union[int, str, None] = None,
+                   limit: Optional[int] = None) -> Tuple[List[Dict], Tuple[int, int]]:
+        """Messages after ``since``, oldest first, plus the buffer version.
+
+        ``since`` is an offset or a ``context_id``; an unknown context_id
+        (already evicted) returns the whole buffer. The version is
+        ``(first_offset, next_offset)`` and changes whenever the buffer does.
+        """
+        with self._lock:
+            self._refresh()
+            messages = list(self._messages)
+            version = (messages[0]["offset"] if messages else self._next_offset, self._next_offset)
+        if isinstance(since, int):
+            messages = messages[bisect.bisect_right(messages, since, key=lambda m: m["offset"]):]
+        elif since is not None:
+            for position, message in enumerate(messages):
+                if message.get("context_id") == since:
+                    messages = messages[position + 1:]
+                    break
+        if limit is not None:
+            messages = messages[:limit]
+        return messages, version
+
+    def wait(self, after: int, timeout: float, poll_interval: float = 0.5) -> bool:
+        """Block until a message with offset > ``after`` exists or ``timeout`` expires.
+
+        Local appends wake waiters at once; another process's writes are
+        picked up by re-checking the file every ``poll_interval`` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                self._refresh()
+                if self._next_offset > after + 1:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(min(poll_interval, remaining))
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="mcp-outbox", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Atomically rewrite the outbox file if anything changed."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                messages = list(self._messages)
+                written, stamp = self._pending, self._stamp
+
+            try:
+                try:
+                    version = self.state.write(messages, expected_version=stamp)
+                except StaleStateError:
+                    self._merge()
+                    return
+                with self._lock:
+                    self._stamp = version
+                    self._pending -= written
+            except IOError as e:
+                print(f"MCP outbox write error: {e}")
+
+    def _merge(self):
+        """Append unwritten local messages to another process's file contents."""
+        with self.state.locked():
+            disk, _ = self.state.read_versioned()
+            with self._lock:
+                local = list(self._messages)
+                fresh = local[len(local) - min(self._pending, len(local)):]
+                offset = _number(disk)
+                offset = max(offset, fresh[0]["offset"] if fresh else 0)  # Never move local offsets back
+                for message in fresh:
+                    message["offset"] = offset
+                    offset += 1
+                messages = (disk + fresh)[-self.capacity:]
+                self._stamp = self.state.write(messages)
+                self._messages = deque(messages, maxlen=self.capacity)
+                self._next_offset = max(self._next_offset, offset)
+                self._pending = 0
+                self._changed.notify_all()
+
+    def close(self):
+        """Stop the writer thread and flush what is left."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.flush()
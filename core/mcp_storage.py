@@ -0,0 +1,416 @@
+import bisect
+import copy
+import functools
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.json_state import JsonStateFile
+
+SQL_BATCH = 500  # Max bound parameters per IN (...) clause
+
+
+def _file_locked(method):
+    """Run a JsonMessageStore read-modify-write under the file's writer lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.state.locked():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class JsonMessageStore:
+    """Single JSON array file, rewritten on every change (legacy format).
+
+    The parsed list and an id -> position index are cached and only
+    re-parsed when the file's mtime or size changes, so point lookups and
+    duplicate checks are O(1) between writes. The cache also partitions
+    positions by receiver, so reading one inbox only touches that
+    receiver's messages. Messages handed to callers are copies, so
+    mutating them cannot leak into the cache.
+
+    Each message carries a monotonically increasing ``seq``; per-receiver
+    read cursors are kept in a ``<message_file>.cursors`` side file.
+    Every read-modify-write holds the file's cross-process writer lock.
+    """
+
+    def __init__(self, message_file: str, max_messages: int = 1000):
+        self.message_file = message_file
+        self.cursor_file = f"{message_file}.cursors"
+        self.state = JsonStateFile(message_file)
+        self.cursors = JsonStateFile(self.cursor_file, default=dict, indent=None)
+        self.max_messages = max_messages
+        self._messages: List[Dict] = []
+        self._index: Dict[str, int] = {}
+        self._partitions: Dict[str, List[int]] = {}
+        self._next_seq = 1
+        self._stamp = None
+        self._ensure_file_exists()
+
+    def _ensure_file_exists(self):
+        """Ensure message file exists and is valid JSON."""
+        self.state.ensure()
+
+    def _remember(self, messages: List[Dict], stamp):
+        self._messages = messages
+        self._index = {}
+        self._partitions = {}
+        last_seq = 0
+        for position, msg in enumerate(messages):
+            self._index.setdefault(msg.get("id"), position)  # First match wins, as before
+            self._partitions.setdefault(msg["receiver"], []).append(position)
+            last_seq = max(last_seq, msg.get("seq", 0))
+        # Never hand out a seq at or below a committed cursor, even after a clear
+        self._next_seq = max(last_seq, *self._load_cursors().values(), 0) + 1
+        self._stamp = stamp
+
+    def _load(self) -> List[Dict]:
+        stamp = self.state.version()
+        if stamp is not None and stamp == self._stamp:
+            return self._messages
+        messages, stamp = self.state.read_versioned()
+        self._remember(messages, stamp)
+        return messages
+
+    def _save(self, messages: List[Dict]):
+        self._stamp = None  # Force a re-read if the write fails halfway
+        self._remember(messages, self.state.write(messages))
+
+    def get(self, message_id: str) -> Dict:
+        self._load()
+        position = self._index.get(message_id)
+        return None if position is None else copy.deepcopy(self._messages[position])
+
+    def append(self, message: Dict):
+        self.append_many([message])
+
+    @_file_locked
+    def append_many(self, batch: List[Dict], raise_errors: bool = False):
+        messages = self._load()
+        seen = set()
+        fresh = []
+        for message in batch:
+            if message["id"] in self._index or message["id"] in seen:
+                continue  # Idempotent re-send
+            seen.add(message["id"])
+            fresh.append(message)
+        if not fresh:
+            return
+        for message in fresh:
+            message["seq"] = self._next_seq
+            self._next_seq += 1
+        messages = messages + fresh
+
+        # Keep only the newest messages to prevent file bloat
+        if len(messages) > self.max_messages:
+            messages = messages[-self.max_messages:]
+
+        try:
+            self._save(messages)
+        except IOError as e:
+            if raise_errors:
+                raise
+            print(f"MCP Manager: Error writing messages - {e}")
+
+    def read(self, receiver: str, unprocessed_only: bool = False) -> List[Dict]:
+        messages = self._load()
+        return copy.deepcopy([
+            messages[position] for position in self._partitions.get(receiver, ())
+            if not (unprocessed_only and messages[position].get("processed", False))
+        ])
+
+    def read_since(self, receiver: str, cursor: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        messages = self._load()
+        partition = self._partitions.get(receiver, [])
+        start = bisect.bisect_right(partition, cursor, key=lambda position: messages[position].get("seq", 0))
+        end = len(partition) if limit is None else min(len(partition), start + limit)
+        batch = copy.deepcopy([messages[position] for position in partition[start:end]])
+        return batch, (batch[-1]["seq"] if batch else cursor)
+
+    def _load_cursors(self) -> Dict[str, int]:
+        return self.cursors.read()
+
+    def get_cursor(self, receiver: str) -> int:
+        return self._load_cursors().get(receiver, 0)
+
+    def commit_cursor(self, receiver: str, cursor: int):
+        self.cursors.update(lambda cursors: {**cursors, receiver: cursor})
+
+    @_file_locked
+    def mark_processed(self, message_id: str):
+        try:
+            messages = self._load()
+            position = self._index.get(message_id)
+            if position is None or messages[position].get("processed", False):
+                return  # Nothing to change: skip the rewrite
+            messages[position]["processed"] = True
+            self._save(messages)
+        except IOError:
+            pass
+
+    @_file_locked
+    def mark_processed_many(self, message_ids: Iterable[str]) -> int:
+        marked = 0
+        try:
+            messages = self._load()
+            for message_id in set(message_ids):
+                position = self._index.get(message_id)
+                if position is not None and not messages[position].get("processed", False):
+                    messages[position]["processed"] = True
+                    marked += 1
+            if marked:
+                self._save(messages)
+        except IOError:
+            pass
+        return marked
+
+    @_file_locked
+    def claim(self, receiver: str, limit: int = None) -> List[Dict]:
+        claimed = []
+        try:
+            messages = self._load()
+            for msg in messages:
+                if limit is not None and len(claimed) >= limit:
+                    break
+                if msg["receiver"] == receiver and not msg.get("processed", False):
+                    msg["processed"] = True
+                    claimed.append(msg)
+            if claimed:
+                self._save(messages)
+        except IOError as e:
+            print(f"MCP Manager: Error claiming messages - {e}")
+            return []
+        return copy.deepcopy(claimed)
+
+    def stats(self) -> Dict[str, int]:
+        messages = self._load()
+        total = len(messages)
+        processed = len([msg for msg in messages if msg.get("processed", False)])
+        return {"total": total, "processed": processed, "unprocessed": total - processed}
+
+    @_file_locked
+    def clear(self):
+        try:
+            self._save([])
+        except IOError as e:
+            print(f"MCP Manager: Error clearing messages - {e}")
+
+    @_file_locked
+    def clear_processed(self):
+        try:
+            # Keep only unprocessed messages
+            self._save([msg for msg in self._load() if not msg.get("processed", False)])
+        except IOError as e:
+            print(f"MCP Manager: Error clearing processed messages - {e}")
+
+
+class SQLiteMessageStore:
+    """SQLite message table in WAL mode.
+
+    Messages are indexed by ``id``, ``receiver``/``processed`` and ``timestamp``,
+    so inserts and point updates are O(log N) and several processes can
+    read while one writes. Each thread gets its own connection.
+
+    The ``(receiver, seq)`` index partitions the table per receiver, and
+    per-receiver read cursors live in the ``cursors`` table.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL,
+            sender TEXT NOT NULL,
+            receiver TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            iso_timestamp TEXT NOT NULL,
+            processed INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_messages_id ON messages (id);
+        CREATE INDEX IF NOT EXISTS idx_messages_receiver ON messages (receiver, processed, seq);
+        CREATE INDEX IF NOT EXISTS idx_messages_processed ON messages (processed);
+        CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_messages_receiver_seq ON messages (receiver, seq);
+        CREATE TABLE IF NOT EXISTS cursors (
+            receiver TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 5.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_message(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "seq": row["seq"],
+            "sender": row["sender"],
+            "receiver": row["receiver"],
+            "content": json.loads(row["content"]),
+            "timestamp": row["timestamp"],
+            "iso_timestamp": row["iso_timestamp"],
+            "processed": bool(row["processed"]),
+        }
+
+    @staticmethod
+    def _to_row(message: Dict) -> tuple:
+        return (
+            message["id"], message["sender"], message["receiver"],
+            json.dumps(message["content"], default=str),
+            message["timestamp"], message["iso_timestamp"], int(message.get("processed", False)),
+        )
+
+    def append(self, message: Dict):
+        self.append_many([message])
+
+    def get(self, message_id: str) -> Dict:
+        row = self._connect().execute(
+            "SELECT * FROM messages WHERE id = ? ORDER BY seq LIMIT 1", (message_id,)
+        ).fetchone()
+        return None if row is None else self._to_message(row)
+
+    def append_many(self, batch: List[Dict], raise_errors: bool = False):
+        """Insert a batch in one transaction, skipping ids already stored."""
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO messages (id, sender, receiver, content, timestamp, iso_timestamp, processed) "
+                    "SELECT ?, ?, ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM messages WHERE id = ?)",
+                    [self._to_row(message) + (message["id"],) for message in batch],
+                )
+        except sqlite3.Error as e:
+            if raise_errors:
+                raise
+            print(f"MCP Manager: Error writing messages - {e}")
+
+    def read(self, receiver: str, unprocessed_only: bool = False) -> List[Dict]:
+        query = "SELECT * FROM messages WHERE receiver = ?"
+        if unprocessed_only:
+            query += " AND processed = 0"
+        rows = self._connect().execute(query + " ORDER BY seq", (receiver,)).fetchall()
+        return [self._to_message(row) for row in rows]
+
+    def read_since(self, receiver: str, cursor: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        rows = self._connect().execute(
+            "SELECT * FROM messages WHERE receiver = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (receiver, cursor, -1 if limit is None else limit),
+        ).fetchall()
+        return [self._to_message(row) for row in rows], (rows[-1]["seq"] if rows else cursor)
+
+    def get_cursor(self, receiver: str) -> int:
+        row = self._connect().execute("SELECT seq FROM cursors WHERE receiver = ?", (receiver,)).fetchone()
+        return row["seq"] if row else 0
+
+    def commit_cursor(self, receiver: str, cursor: int):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO cursors (receiver, seq) VALUES (?, ?) "
+                    "ON CONFLICT(receiver) DO UPDATE SET seq = excluded.seq",
+                    (receiver, cursor),
+                )
+        except sqlite3.Error as e:
+            print(f"MCP Manager: Error saving cursor - {e}")
+
+    def mark_processed(self, message_id: str):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE messages SET processed = 1 WHERE seq = (SELECT MIN(seq) FROM messages WHERE id = ?)",
+                    (message_id,),
+                )
+        except sqlite3.Error:
+            pass
+
+    def mark_processed_many(self, message_ids: Iterable[str]) -> int:
+        """Flip the processed flag for many ids in one transaction."""
+        message_ids = list(message_ids)
+        marked = 0
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(message_ids), SQL_BATCH):
+                    chunk = message_ids[start:start + SQL_BATCH]
+                    cursor = conn.execute(
+                        f"UPDATE messages SET processed = 1 WHERE processed = 0 AND id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    marked += cursor.rowcount
+        except sqlite3.Error:
+            return 0
+        return marked
+
+    def claim(self, receiver: str, limit: int = None) -> List[Dict]:
+        """Fetch and mark unprocessed messages atomically.
+
+        ``BEGIN IMMEDIATE`` takes the write lock before the SELECT, so two
+        processes claiming the same receiver never get the same message.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM messages WHERE receiver = ? AND processed = 0 ORDER BY seq LIMIT ?",
+                (receiver, -1 if limit is None else limit),
+            ).fetchall()
+            seqs = [row["seq"] for row in rows]
+            for start in range(0, len(seqs), SQL_BATCH):
+                chunk = seqs[start:start + SQL_BATCH]
+                conn.execute(f"UPDATE messages SET processed = 1 WHERE seq IN ({','.join('?' * len(chunk))})", chunk)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"MCP Manager: Error claiming messages - {e}")
+            return []
+        claimed = [self._to_message(row) for row in rows]
+        for message in claimed:
+            message["processed"] = True
+        return claimed
+
+    def stats(self) -> Dict[str, int]:
+        total, processed = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(processed), 0) FROM messages"
+        ).fetchone()
+        return {"total": total, "processed": processed, "unprocessed": total - processed}
+
+    def clear(self):
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM messages")
+        except sqlite3.Error as e:
+            print(f"MCP Manager: Error clearing messages - {e}")
+
+    def clear_processed(self):
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM messages WHERE processed = 1")
+        except sqlite3.Error as e:
+            print(f"MCP Manager: Error clearing processed messages - {e}")
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def open_message_store(message_file: str, backend: str = None):
+    """Pick a store by explicit backend name or by file extension."""
+    if backend is None:
+        backend = "sqlite" if message_file.endswith(SQLITE_EXTENSIONS) else "json"
+    if backend == "sqlite":
+        return SQLiteMessageStore(message_file)
+    if backend == "json":
+        return JsonMessageStore(message_file)
+    raise ValueError(f"Unknown MCP storage backend: {backend}")
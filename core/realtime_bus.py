@@ -1,98 +1,218 @@
-import queue
 import threading
 import time
 import json
 from datetime import datetime
-from typing import Dict, List, Callable
-import csv
-import os
+from typing import Dict, Iterable, List, Callable, Optional, Tuple
+from contextlib import contextmanager
+from core.dispatcher import SyncDispatcher, make_dispatcher
+from core.bus_metrics import BusMetrics
+from core.topic_buffer import TopicBuffer
+from config import BUS_DISPATCH, BUS_METRICS, BUS_BUFFERS
+
+BUFFER_MODES = ("always", "on_demand")
 
 class RealtimeBus:
-    def __init__(self):
-        self.queues: Dict[str, queue.Queue] = {}
-        self.subscribers: Dict[str, List[Callable]] = {}
+    def __init__(self, dispatcher=None, performance_log="logs/performance_log.csv", metrics_options=None,
+                 buffer_capacity=10000, eviction_policy="drop_oldest", buffer_mode="always"):
+        if buffer_mode not in BUFFER_MODES:
+            raise ValueError(f"Unknown buffer mode: {buffer_mode}")
+        # Bounded per-topic buffers. In "on_demand" mode a topic that has push
+        # subscribers is only buffered once someone pulls from it.
+        self.queues: Dict[str, TopicBuffer] = {}
+        self.buffer_capacity = buffer_capacity
+        self.eviction_policy = eviction_policy
+        self.buffer_mode = buffer_mode
+        self._pulled = set()
+        # Subscriber tuples are replaced, never mutated, so publishers read them without locking
+        self.subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        self.dispatcher = dispatcher or SyncDispatcher()
+        self._registry_lock = threading.RLock()
+        self._data_ready = threading.Condition()
+        self._selectors = 0  # Threads blocked in select()
+        self._batch = threading.local()
+        self._counter = threading.local()
+        self._counter_cells: List[List[int]] = []
         self.running = True
-        self.performance_log = "logs/performance_log.csv"
-        self.message_count = 0
+        self.performance_log = performance_log
         self.start_time = time.time()
         
-        # Initialize performance log
-        os.makedirs("logs", exist_ok=True)
-        if not os.path.exists(self.performance_log):
-            with open(self.performance_log, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'event_type', 'throughput_per_sec', 'queue_size', 'total_messages'])
+        # Performance rows are aggregated in memory and written in the background
+        self.metrics = BusMetrics(performance_log, **(metrics_options or {}))
+    
+    @property
+    def message_count(self) -> int:
+        """Total messages published, merged from the per-thread counters"""
+        with self._registry_lock:
+            cells = list(self._counter_cells)
+        return sum(cell[0] for cell in cells)
+    
+    def _count(self, n: int = 1):
+        """Bump this thread's counter; only the owning thread ever writes it"""
+        cell = getattr(self._counter, 'cell', None)
+        if cell is None:
+            cell = self._counter.cell = [0]
+            with self._registry_lock:
+                self._counter_cells.append(cell)
+        cell[0] += n
     
     def create_queue(self, name: str):
-        """Create a new message queue"""
-        self.queues[name] = queue.Queue()
-        self.subscribers[name] = []
+        """Create a new message queue (no-op if the topic already exists)"""
+        with self._registry_lock:
+            if name not in self.queues:
+                self.queues[name] = TopicBuffer(self.buffer_capacity, self.eviction_policy)
+            self.subscribers.setdefault(name, ())
+        return self.queues[name]
+    
+    def _should_buffer(self, topic: str) -> bool:
+        return self.buffer_mode == "always" or not self.subscribers.get(topic) or topic in self._pulled
+    
+    def _queue_for(self, topic: str) -> TopicBuffer:
+        topic_queue = self.queues.get(topic)
+        if topic_queue is None:
+            topic_queue = self.create_queue(topic)
+        return topic_queue
     
     def publish(self, topic: str, message: dict):
         """Publish message to topic"""
-        if topic not in self.queues:
-            self.create_queue(topic)
+        pending = getattr(self._batch, 'pending', None)
+        if pending is not None:
+            pending.setdefault(topic, []).append(message)
+            return
+        
+        started = time.perf_counter() if self.metrics.should_sample() else None
+        topic_queue = self._queue_for(topic)
         
         message['timestamp'] = datetime.now().isoformat()
-        self.queues[topic].put(message)
-        self.message_count += 1
+        if self._should_buffer(topic):
+            topic_queue.put(message)
+        self._count()
+        self._wake_selectors()
+        
+        # Notify subscribers (inline or via the dispatch pool)
+        self.dispatcher.dispatch(self.subscribers.get(topic, ()), message)
+        
+        self._log_performance(topic, started)
+    
+    def publish_many(self, topic: str, messages: List[dict]):
+        """Publish a batch to one topic with a single timestamp, dispatch and log row"""
+        if not messages:
+            return
+        started = time.perf_counter() if self.metrics.should_sample() else None
+        topic_queue = self._queue_for(topic)
+        
+        timestamp = datetime.now().isoformat()
+        for message in messages:
+            message['timestamp'] = timestamp
+        if self._should_buffer(topic):
+            topic_queue.put_many(messages)
+        self._count(len(messages))
+        self._wake_selectors()
         
-        # Notify subscribers immediately
-        for callback in self.subscribers.get(topic, []):
-            try:
-                callback(message)
-            except Exception as e:
-                print(f"Subscriber error: {e}")
+        self.dispatcher.dispatch_many(self.subscribers.get(topic, ()), messages)
         
-        self._log_performance(topic)
+        self._log_performance(topic, started, len(messages))
+    
+    @contextmanager
+    def batch(self):
+        """Buffer publish() calls on this thread and flush them per topic on exit"""
+        if getattr(self._batch, 'pending', None) is not None:
+            yield self  # Nested batch joins the outer one
+            return
+        self._batch.pending = {}
+        try:
+            yield self
+        finally:
+            pending, self._batch.pending = self._batch.pending, None
+            for topic, messages in pending.items():
+                self.publish_many(topic, messages)
     
     def subscribe(self, topic: str, callback: Callable):
         """Subscribe to topic with callback"""
-        if topic not in self.subscribers:
-            self.subscribers[topic] = []
-        self.subscribers[topic].append(callback)
+        with self._registry_lock:
+            self.subscribers[topic] = self.subscribers.get(topic, ()) + (callback,)
+    
+    def attach_loop(self, loop):
+        """Register the event loop that runs coroutine subscribers."""
+        self.dispatcher.attach_loop(loop)
     
     def get_messages(self, topic: str, timeout: float = 1.0) -> List[dict]:
-        """Get all messages from topic queue"""
-        if topic not in self.queues:
-            return []
+        """Get all messages from topic queue, waiting up to timeout only if it is empty"""
+        return self.drain(topic, max_wait=timeout)
+    
+    def drain(self, topic: str, max_items: Optional[int] = None, max_wait: float = 0.0) -> List[dict]:
+        """Return what is queued on topic right now (up to max_items).
         
-        messages = []
-        try:
-            while True:
-                message = self.queues[topic].get(timeout=timeout)
-                messages.append(message)
-                self.queues[topic].task_done()
-        except queue.Empty:
-            pass
-        return messages
-    
-    def _log_performance(self, topic: str):
-        """Log throughput performance"""
-        current_time = time.time()
-        elapsed = current_time - self.start_time
-        throughput = self.message_count / elapsed if elapsed > 0 else 0
-        queue_size = self.queues[topic].qsize()
+        If the queue is empty, wait up to max_wait seconds for the first
+        message; once anything is available, return without further waiting.
+        """
+        self._pulled.add(topic)
+        topic_queue = self.queues.get(topic)
+        if topic_queue is None:
+            return []
+        return topic_queue.drain(max_items, max_wait)
+    
+    def select(self, topics: Iterable[str], timeout: Optional[float] = None,
+               max_items: Optional[int] = None) -> Dict[str, List[dict]]:
+        """Wait until any of topics has messages and drain every ready topic.
         
-        with open(self.performance_log, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                datetime.now().isoformat(),
-                f"message_published_{topic}",
-                f"{throughput:.2f}",
-                queue_size,
-                self.message_count
-            ])
+        Returns {topic: messages} for the topics that had data, or {} on timeout.
+        """
+        topics = list(topics)
+        self._pulled.update(topics)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._data_ready:
+                self._selectors += 1
+                try:
+                    while True:
+                        ready = [t for t in topics if t in self.queues and not self.queues[t].empty()]
+                        if ready:
+                            break
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return {}
+                        self._data_ready.wait(remaining)
+                finally:
+                    self._selectors -= 1
+            
+            result = {}
+            for topic in ready:
+                messages = self.drain(topic, max_items)
+                if messages:
+                    result[topic] = messages
+            if result:
+                return result
+            # Another consumer drained the ready topics first; wait again
+    
+    def _wake_selectors(self):
+        # Publishers enqueue before checking, selectors register before checking,
+        # so skipping the lock when nobody is selecting cannot lose a wakeup
+        if self._selectors:
+            with self._data_ready:
+                self._data_ready.notify_all()
+    
+    def _log_performance(self, topic: str, started: float = None, count: int = 1):
+        """Record throughput, queue depth and publish latency for the metrics writer"""
+        latency = time.perf_counter() - started if started is not None else None
+        self.metrics.record(topic, self.queues[topic].qsize(), latency, count)
     
     def get_stats(self) -> dict:
         """Get bus statistics"""
         elapsed = time.time() - self.start_time
+        total = self.message_count
+        buffers = {topic: buffer.stats() for topic, buffer in list(self.queues.items())}
         return {
-            'total_messages': self.message_count,
-            'throughput_per_sec': self.message_count / elapsed if elapsed > 0 else 0,
+            'total_messages': total,
+            'throughput_per_sec': total / elapsed if elapsed > 0 else 0,
             'active_queues': len(self.queues),
-            'uptime_seconds': elapsed
+            'uptime_seconds': elapsed,
+            'publish_latency_ms': self.metrics.latency_snapshot(),
+            'buffered_messages': sum(b['size'] for b in buffers.values()),
+            'evicted_messages': sum(b['evicted'] for b in buffers.values()),
+            'memory_bytes': sum(b['bytes'] for b in buffers.values()),
+            'buffers': buffers,
+            'dispatch': self.dispatcher.get_stats()
         }
 
 # Global bus instance
-realtime_bus = RealtimeBus()
\ No newline at end of file
+realtime_bus = RealtimeBus(dispatcher=make_dispatcher(**BUS_DISPATCH), metrics_options=BUS_METRICS, **BUS_BUFFERS)
\ No newline at end of file
@@ -1,64 +1,128 @@
-import json
+import asyncio
 import datetime
-import os
-from typing import Dict, List, Callable, Any
+from typing import AsyncIterator, Dict, List, Callable, Any, Optional, Tuple
+from core.event_log import SegmentedEventLog
+from core.json_state import JsonStateFile
+from core.topic_router import TopicRouter
+from core.dispatcher import SyncDispatcher, make_dispatcher
+from config import BUS_DISPATCH
 
 class SovereignBus:
     """Event bus with file-based persistence for cross-process communication."""
-    
-    def __init__(self, log_file="bus_events.json"):
-        self.listeners: Dict[str, List[Callable]] = {}
-        self.log_file = log_file
-        self.message_log: List[Dict] = self._load_messages()
-    
-    def _load_messages(self):
-        """Load existing messages from file."""
-        try:
-            if os.path.exists(self.log_file):
-                with open(self.log_file, 'r') as f:
-                    return json.load(f)
-        except:
-            pass
-        return []
-    
-    def _save_messages(self):
-        """Save messages to file."""
-        try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.message_log[-100:], f, indent=2)  # Keep last 100
-        except Exception as e:
-            print(f"Bus save error: {e}")
-    
+
+    def __init__(self, log_dir="bus_events", segment_bytes=1024 * 1024, retention_segments=8,
+                 history_limit=100, legacy_file="bus_events.json", dispatcher=None):
+        self.router = TopicRouter()
+        self.dispatcher = dispatcher or SyncDispatcher(error_label="Bus error")
+        self.log_dir = log_dir
+        self.history_limit = history_limit
+        self.event_log = SegmentedEventLog(log_dir, segment_bytes, retention_segments)
+        self._import_legacy_log(legacy_file)
+
+    def _import_legacy_log(self, legacy_file):
+        """Seed an empty event log from the old single-file JSON history."""
+        if not legacy_file or self.event_log.next_offset > 0:
+            return
+        for message in JsonStateFile(legacy_file).read():
+            message.pop("offset", None)
+            self.event_log.append(message)
+
     def subscribe(self, event_type: str, callback: Callable):
-        """Subscribe to event type."""
-        if event_type not in self.listeners:
-            self.listeners[event_type] = []
-        self.listeners[event_type].append(callback)
-    
+        """Subscribe to an event type or wildcard pattern (``deploy.*``, ``#``)."""
+        self.router.add(event_type, callback)
+
+    def unsubscribe(self, event_type: str, callback: Callable):
+        """Remove a previously registered callback."""
+        if self.router.remove(event_type, callback):
+            self.dispatcher.discard(callback)
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop = None):
+        """Run coroutine subscribers on ``loop`` (default: the running loop)."""
+        self.dispatcher.attach_loop(loop or asyncio.get_running_loop())
+
+    async def stream(self, event_type: str, max_pending: int = 1000) -> AsyncIterator[Dict]:
+        """Yield events of ``event_type`` as they are published.
+
+        Publishers hand events to the consuming loop with
+        ``call_soon_threadsafe``; if the consumer falls more than
+        ``max_pending`` events behind, the oldest pending event is dropped.
+        """
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue(max_pending)
+
+        def enqueue(message):
+            if pending.full():
+                pending.get_nowait()
+            pending.put_nowait(message)
+
+        def forward(message):
+            try:
+                loop.call_soon_threadsafe(enqueue, message)
+            except RuntimeError:
+                pass  # Consumer loop already closed
+
+        self.subscribe(event_type, forward)
+        try:
+            while True:
+                yield await pending.get()
+        finally:
+            self.unsubscribe(event_type, forward)
+
     def publish(self, event_type: str, data: Any = None):
-        """Publish event to all subscribers and save to file."""
+        """Publish event to all subscribers and append it to the event log."""
         message = {
             "timestamp": datetime.datetime.now().isoformat(),
             "event_type": event_type,
             "data": data
         }
-        self.message_log.append(message)
-        self._save_messages()
-        
+        try:
+            self.event_log.append(message)
+        except (IOError, OSError, TypeError) as e:
+            print(f"Bus save error: {e}")
+
         # Notify local subscribers
-        if event_type in self.listeners:
-            for callback in self.listeners[event_type]:
-                try:
-                    callback(message)
-                except Exception as e:
-                    print(f"Bus error: {e}")
-    
+        callbacks = self.router.match(event_type)
+        if callbacks:
+            self.dispatcher.dispatch(callbacks, message)
+
     def get_messages(self, event_type: str = None) -> List[Dict]:
-        """Get message history."""
-        self.message_log = self._load_messages()  # Refresh from file
+        """Get recent message history (last ``history_limit`` events)."""
+        messages = self.event_log.tail(self.history_limit)
         if event_type:
-            return [msg for msg in self.message_log if msg["event_type"] == event_type]
-        return self.message_log
+            return [msg for msg in messages if msg["event_type"] == event_type]
+        return messages
+
+    def get_dispatch_stats(self) -> Dict:
+        """Per-subscriber lag and drop counters from the dispatcher."""
+        return self.dispatcher.get_stats()
+
+    def read_since(self, offset: int, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """Return events at or after ``offset`` and the offset to resume from."""
+        messages = self.event_log.read(offset, limit)
+        next_offset = messages[-1]["offset"] + 1 if messages else max(offset, self.event_log.first_offset)
+        return messages, next_offset
+
+    def poll(self, offset: int, timeout: Optional[float] = None,
+             limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """Long-poll variant of ``read_since`` that waits for new events."""
+        self.event_log.wait_for(offset, timeout)
+        return self.read_since(offset, limit)
+
+    def consume(self, group: str, timeout: Optional[float] = None,
+                limit: Optional[int] = None) -> List[Dict]:
+        """Read new events for a consumer group and commit its offset.
+
+        A group with no committed offset starts at the current end of the
+        log, so it only sees events published after it first subscribes.
+        """
+        offset = self.event_log.committed(group)
+        if offset is None:
+            offset = self.event_log.next_offset
+            self.event_log.commit(group, offset)
+        messages, next_offset = self.poll(offset, timeout, limit)
+        if next_offset != offset:
+            self.event_log.commit(group, next_offset)
+        return messages
 
 # Global bus instance
-bus = SovereignBus()
\ No newline at end of file
+bus = SovereignBus(dispatcher=make_dispatcher(error_label="Bus error", **BUS_DISPATCH))
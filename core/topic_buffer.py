@@ -0,0 +1,77 @@
+import sys
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional
+
+EVICTION_POLICIES = ("drop_oldest", "drop_newest")
+
+
+def approx_size(message: dict) -> int:
+    """Shallow byte estimate of a message dict and its top-level values."""
+    size = sys.getsizeof(message)
+    for key, value in message.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class TopicBuffer:
+    """Bounded FIFO of messages for one RealtimeBus topic.
+
+    Once ``capacity`` messages are buffered, ``drop_oldest`` evicts the
+    head (a ring buffer) and ``drop_newest`` discards the incoming
+    message. Publishers never block.
+    """
+
+    def __init__(self, capacity: int = 10000, policy: str = "drop_oldest"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.evicted = 0
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+
+    def put(self, message: dict):
+        self.put_many((message,))
+
+    def put_many(self, messages: Iterable[dict]):
+        with self._lock:
+            for message in messages:
+                if len(self._items) >= self.capacity:
+                    self.evicted += 1
+                    if self.policy == "drop_newest":
+                        continue
+                    self._items.popleft()
+                self._items.append(message)
+            self._not_empty.notify_all()
+
+    def drain(self, max_items: Optional[int] = None, max_wait: float = 0.0) -> List[dict]:
+        """Pop up to ``max_items``; wait up to ``max_wait`` only while empty."""
+        with self._lock:
+            if not self._items and max_wait > 0:
+                deadline = time.monotonic() + max_wait
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    self._not_empty.wait(remaining)
+            count = len(self._items) if max_items is None else min(max_items, len(self._items))
+            return [self._items.popleft() for _ in range(count)]
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._items)
+        return {
+            'size': len(items),
+            'capacity': self.capacity,
+            'evicted': self.evicted,
+            'bytes': sum(approx_size(m) for m in items),
+        }
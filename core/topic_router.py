@@ -0,0 +1,112 @@
+import threading
+from itertools import count
+from typing import Callable, Dict, List, Tuple
+
+SINGLE_WILDCARD = "*"  # Exactly one dotted segment
+MULTI_WILDCARD = "#"   # Zero or more dotted segments
+
+
+class _Node:
+    __slots__ = ("children", "subscribers")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.subscribers: List[Tuple[int, Callable]] = []
+
+
+class TopicRouter:
+    """Resolve dotted topics to subscribers through a subscription trie.
+
+    Patterns are dotted like the event types in ``core/event_schema.py``;
+    ``deploy.*`` matches one trailing segment and ``heal.#`` or ``#``
+    match any number. Resolved subscriber tuples are cached per topic and
+    the cache is cleared whenever subscriptions change, so steady-state
+    dispatch is a dict lookup and a cold lookup walks at most the topic's
+    depth in the trie.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self._root = _Node()
+        self._cache: Dict[str, Tuple[Callable, ...]] = {}
+        self._cache_size = cache_size
+        self._lock = threading.RLock()
+        self._sequence = count()
+
+    def add(self, pattern: str, callback: Callable):
+        """Register ``callback`` for topics matching ``pattern``."""
+        with self._lock:
+            node = self._root
+            for segment in pattern.split("."):
+                node = node.children.setdefault(segment, _Node())
+            node.subscribers.append((next(self._sequence), callback))
+            self._cache = {}
+
+    def remove(self, pattern: str, callback: Callable) -> bool:
+        """Unregister one subscription; return False if it was not found."""
+        with self._lock:
+            path = [self._root]
+            for segment in pattern.split("."):
+                child = path[-1].children.get(segment)
+                if child is None:
+                    return False
+                path.append(child)
+            node = path[-1]
+            for i, (_, subscriber) in enumerate(node.subscribers):
+                if subscriber == callback:
+                    del node.subscribers[i]
+                    break
+            else:
+                return False
+            # Prune branches left without subscribers
+            for parent, segment in zip(reversed(path[:-1]), reversed(pattern.split("."))):
+                child = parent.children[segment]
+                if child.subscribers or child.children:
+                    break
+                del parent.children[segment]
+            self._cache = {}
+            return True
+
+    def match(self, topic: str) -> Tuple[Callable, ...]:
+        """Subscribers for ``topic`` in registration order."""
+        cached = self._cache.get(topic)
+        if cached is not None:
+            return cached
+        with self._lock:
+            found: List[Tuple[int, Callable]] = []
+            self._collect(self._root, topic.split("."), 0, found)
+            unique = dict(found)  # Overlapping '#' paths can reach a node twice
+            result = tuple(unique[seq] for seq in sorted(unique))
+            if len(self._cache) >= self._cache_size:
+                self._cache = {}
+            self._cache[topic] = result
+            return result
+
+    def _collect(self, node: _Node, segments: List[str], depth: int, found: List[Tuple[int, Callable]]):
+        multi = node.children.get(MULTI_WILDCARD)
+        if multi is not None:
+            # '#' swallows segments[depth:], any suffix of them, or nothing
+            for skip in range(depth, len(segments) + 1):
+                self._collect(multi, segments, skip, found)
+        if depth == len(segments):
+            found.extend(node.subscribers)
+            return
+        for key in (segments[depth], SINGLE_WILDCARD):
+            child = node.children.get(key)
+            if child is not None:
+                self._collect(child, segments, depth + 1, found)
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """Check a single topic against a single pattern without a router."""
+    return _segments_match(pattern.split("."), topic.split("."))
+
+
+def _segments_match(pattern: List[str], topic: List[str]) -> bool:
+    if not pattern:
+        return not topic
+    head = pattern[0]
+    if head == MULTI_WILDCARD:
+        return any(_segments_match(pattern[1:], topic[i:]) for i in range(len(topic) + 1))
+    if not topic:
+        return False
+    return head in (SINGLE_WILDCARD, topic[0]) and _segments_match(pattern[1:], topic[1:])
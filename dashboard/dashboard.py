@@ -1,13 +1,17 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
 import plotly.express as px
 import plotly.graph_objects as go
 import datetime
 import time
-import json
 import numpy as np
 
+# Make the project's core package importable when run via `streamlit run dashboard/dashboard.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.json_state import JsonStateFile
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="InsightFlow Dashboard",
@@ -32,28 +36,19 @@ os.makedirs("insightflow", exist_ok=True)
 os.makedirs("dataset", exist_ok=True)
 
 # Initialize telemetry if not exists
-if not os.path.exists("insightflow/telemetry.json"):
-    with open("insightflow/telemetry.json", "w") as f:
-        json.dump([], f)
+telemetry_state = JsonStateFile("insightflow/telemetry.json")
+telemetry_state.ensure()
 
 # --- Telemetry Functions ---
 @st.cache_data(ttl=10)
 def load_telemetry():
-    try:
-        with open("insightflow/telemetry.json", 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    return telemetry_state.read()
 
 def store_telemetry(entry):
+    # Locked read-modify-write on the live file, not the cached copy, so main.py's entries are kept
     try:
-        telemetry = load_telemetry()
-        telemetry.append(entry)
-        if len(telemetry) > 1000:
-            telemetry = telemetry[-1000:]
-        with open("insightflow/telemetry.json", 'w') as f:
-            json.dump(telemetry, f, indent=2)
-    except:
+        telemetry_state.update(lambda telemetry: (telemetry + [entry])[-1000:])
+    except OSError:
         pass
 
 # --- Data Loading ---
@@ -1,27 +1,39 @@
-import json
 import time
-import os
 from datetime import datetime
+from core.json_state import JsonStateFile
 from core.sovereign_bus import bus
+from core.topic_router import topic_matches
 
 class TelemetryCollector:
     """Collects real-time telemetry from agents via sovereign bus."""
     
     def __init__(self, telemetry_file="insightflow/telemetry.json"):
         self.telemetry_file = telemetry_file
+        self.state = JsonStateFile(telemetry_file)
         self.agent_status = {}
         self._setup_listeners()
     
+    EVENTS = [
+        "deploy.*", "issue.*", "heal.*",
+        "system.*", "uptime.*", "rl.learned"
+    ]
+    
     def _setup_listeners(self):
         """Subscribe to all agent events."""
-        events = [
-            "deploy.success", "deploy.failure", 
-            "issue.detected", "heal.triggered", 
-            "uptime.changed", "rl.learned"
-        ]
-        for event in events:
+        for event in self.EVENTS:
             bus.subscribe(event, self._collect_telemetry)
     
+    def follow(self, group="telemetry", stop_event=None, timeout=5.0):
+        """Collect events published by other processes via the bus log.
+        
+        Long-polls the event log under a consumer group so the committed
+        offset survives restarts; runs until ``stop_event`` is set.
+        """
+        while stop_event is None or not stop_event.is_set():
+            for message in bus.consume(group, timeout=timeout):
+                if any(topic_matches(pattern, message["event_type"]) for pattern in self.EVENTS):
+                    self._collect_telemetry(message)
+    
     def _collect_telemetry(self, message):
         """Collect telemetry data from bus messages."""
         telemetry_entry = {
@@ -46,20 +58,8 @@ class TelemetryCollector:
     def _store_telemetry(self, entry):
         """Store telemetry entry to JSON file."""
         try:
-            if os.path.exists(self.telemetry_file):
-                with open(self.telemetry_file, 'r') as f:
-                    telemetry = json.load(f)
-            else:
-                telemetry = []
-            
-            telemetry.append(entry)
-            
             # Keep only last 1000 entries
-            if len(telemetry) > 1000:
-                telemetry = telemetry[-1000:]
-            
-            with open(self.telemetry_file, 'w') as f:
-                json.dump(telemetry, f, indent=2)
+            self.state.update(lambda telemetry: (telemetry + [entry])[-1000:])
         except Exception as e:
             print(f"Telemetry error: {e}")
 
@@ -13,12 +13,17 @@ class WebSocketServer:
     
     def _setup_bus_listeners(self):
         """Subscribe to bus events for real-time updates."""
-        events = ["deploy.success", "deploy.failure", "issue.detected", "heal.triggered"]
+        events = ["deploy.*", "issue.*", "heal.*", "system.*"]
         for event in events:
             bus.subscribe(event, self._broadcast_update)
     
     async def _broadcast_update(self, message):
-        """Broadcast bus message to all connected clients."""
+        """Broadcast bus message to all connected clients.
+        
+        Runs on the server's event loop; ``websockets.broadcast`` writes to
+        every client without awaiting each one, so a slow client cannot hold
+        up the others.
+        """
         if self.clients:
             update = {
                 "type": "agent_update",
@@ -26,16 +31,7 @@ class WebSocketServer:
                 "data": message.get("data", {}),
                 "timestamp": message["timestamp"]
             }
-            
-            disconnected = set()
-            for client in self.clients:
-                try:
-                    await client.send(json.dumps(update))
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected.add(client)
-            
-            # Remove disconnected clients
-            self.clients -= disconnected
+            websockets.broadcast(self.clients, json.dumps(update))
     
     async def handle_client(self, websocket, path):
         """Handle new WebSocket client connection."""
@@ -62,9 +58,11 @@ class WebSocketServer:
             self.clients.remove(websocket)
             print(f"📡 Dashboard client disconnected ({len(self.clients)} total)")
     
-    def start_server(self):
+    def start_server(self, loop=None):
         """Start WebSocket server."""
         print(f"🌐 WebSocket server starting on port {self.port}")
+        # Bus publishers run on other threads; schedule broadcasts on this loop
+        bus.attach_loop(loop or asyncio.get_event_loop())
         return websockets.serve(self.handle_client, "localhost", self.port)
 
 # Global server instance
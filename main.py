@@ -37,7 +37,7 @@ if __name__ == "__main__":
     # --- Agent Initialization ---
     print("🔗 Initializing MCP Integration...")
     # Initialize Ritesh's MCP Manager
-    mcp_manager = MCPManager("mcp_messages.json")
+    mcp_manager = MCPManager("mcp_messages.db")
     mcp_adapter = MCPAdapter(mcp_manager)
     print("✅ MCP Manager integrated with sovereign bus")
     
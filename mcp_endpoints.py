@@ -1,79 +1,355 @@
 #!/usr/bin/env python3
 """Simple HTTP endpoints for MCP integration."""
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
+import threading
+import time
 import urllib.parse
-from core.mcp_bridge import mcp_bridge
+from config import MCP_SERVER
+from core import mcp_codec
+from core.mcp_bridge import MCPBridge, mcp_bridge
 
 class MCPHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; every response
+    # therefore carries a Content-Length.
+    protocol_version = "HTTP/1.1"
+    timeout = MCP_SERVER["keepalive_timeout"]
+    # Headers and body are separate writes; without TCP_NODELAY the body
+    # waits on the client's delayed ACK (~40 ms) on a reused connection.
+    disable_nagle_algorithm = True
+
+    def _send_body(self, status, body, content_type, headers=None):
+        """Send a complete response, gzipped when the client accepts it and it pays off."""
+        gzipped = len(body) >= mcp_codec.GZIP_MIN_BYTES and mcp_codec.accepts_gzip(self.headers.get('Accept-Encoding'))
+        if gzipped:
+            body = mcp_codec.compress(body)
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept, Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        """Send ``payload`` as compact JSON, or MessagePack if the client asks and it is available."""
+        content_type = mcp_codec.negotiate(self.headers.get('Accept'))
+        self._send_body(status, mcp_codec.encode(payload, content_type), content_type, headers)
+
+    def _read_body(self):
+        """Read a Content-Length or ``Transfer-Encoding: chunked`` request body."""
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            return self._read_chunked()
+        content_length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(content_length)
+
+    def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline(1024).split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                break
+            chunks.append(self.rfile.read(size))
+            if self.rfile.readline(1024).strip():
+                raise ValueError("malformed chunk")
+        while self.rfile.readline(1024).strip():  # Trailer headers
+            pass
+        return b''.join(chunks)
+
     def do_GET(self):
         """Handle GET requests."""
-        if self.path == '/' or self.path == '':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
+        url = urllib.parse.urlsplit(self.path)
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+
+        if url.path == '/mcp_outbox':
+            try:
+                self._get_outbox(params)
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+
+        elif url.path == '/mcp_outbox/stream':
+            if not self._hold_worker():
+                return
+            try:
+                self._stream_outbox(params)
+            finally:
+                self.server.hold_slots.release()
+
+        elif self.path == '/' or self.path == '':
             html = '''<!DOCTYPE html>
 <html><head><title>MCP Endpoints</title></head>
 <body>
 <h1>MCP Integration Endpoints</h1>
 <ul>
-<li><a href="/mcp_outbox">GET /mcp_outbox</a> - Get messages from bus</li>
+<li><a href="/mcp_outbox">GET /mcp_outbox</a> - Get messages from bus (<code>?since=&amp;limit=&amp;wait=</code>)</li>
+<li><a href="/mcp_outbox/stream">GET /mcp_outbox/stream</a> - Server-Sent Events feed</li>
 <li><a href="/health">GET /health</a> - Health check</li>
 <li>POST /mcp_inbox - Send messages to bus</li>
+<li>POST /mcp_inbox/batch - Send a JSON array or NDJSON stream of messages</li>
 </ul>
 </body></html>'''
-            self.wfile.write(html.encode())
-            
-        elif self.path == '/mcp_outbox':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            messages = mcp_bridge.get_outbox_messages()
-            self.wfile.write(json.dumps(messages).encode())
+            self._send_body(200, html.encode(), 'text/html')
             
         elif self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok"}).encode())
+            self._send_json(200, {"status": "ok"})
             
         else:
-            self.send_response(404)
-            self.end_headers()
+            self._send_body(404, b'', 'text/plain')
     
+    def _hold_worker(self):
+        """Claim one of the server's slots for a request that blocks; 503 when none are left.
+
+        Streams and long-polls keep a pool worker busy, so they are capped
+        below ``max_workers`` to leave workers for ordinary requests.
+        """
+        if self.server.hold_slots.acquire(blocking=False):
+            return True
+        self._send_json(503, {"error": "too many open streams and long-polls"}, {'Retry-After': '1'})
+        return False
+
+    def _get_outbox(self, params):
+        """Paged, conditional and optionally long-polling outbox read.
+
+        ``since`` is an offset or context_id, ``limit`` caps the page and
+        ``wait`` blocks up to that many seconds while there is nothing new.
+        The ETag identifies the page returned, so asking again for an
+        unchanged page answers 304 to ``If-None-Match``.
+        """
+        outbox = mcp_bridge.outbox
+        since = parse_since(params.get('since'))
+        limit = int(params['limit']) if 'limit' in params else None
+        wait = min(float(params.get('wait', 0)), MCP_SERVER["max_wait"])
+
+        messages, version = outbox.read_since(since, limit)
+        next_offset = next_since(messages, since, version)
+        etag = make_etag(messages, next_offset)
+        unchanged = self.headers.get('If-None-Match') == etag
+        # A full page cannot change by waiting; anything else can grow
+        can_grow = limit is None or len(messages) < limit
+        if wait > 0 and can_grow and (unchanged or (since is not None and not messages)):
+            if not self._hold_worker():
+                return
+            try:
+                if outbox.wait(next_offset, wait):
+                    messages, version = outbox.read_since(since, limit)
+                    next_offset = next_since(messages, since, version)
+                    etag = make_etag(messages, next_offset)
+                    unchanged = self.headers.get('If-None-Match') == etag
+            finally:
+                self.server.hold_slots.release()
+
+        if unchanged:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send_json(200, messages, {'ETag': etag, 'X-Next-Since': str(next_offset)})
+
+    def _stream_outbox(self, params):
+        """Server-Sent Events: push each outbox message as it arrives.
+
+        Resumes after ``Last-Event-ID`` or ``?since=`` when given, otherwise
+        starts with the messages currently buffered.
+        """
+        outbox = mcp_bridge.outbox
+        since = parse_since(self.headers.get('Last-Event-ID') or params.get('since'))
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')  # No Content-Length: the stream ends with the connection
+        self.end_headers()
+        self.close_connection = True
+
+        last_write = time.monotonic()
+        try:
+            while not self.server.stopping.is_set():
+                messages, version = outbox.read_since(since)
+                for message in messages:
+                    self.wfile.write(f"id: {message['offset']}\ndata: ".encode() + mcp_codec.dumps(message) + b"\n\n")
+                    since = message["offset"]
+                if messages:
+                    last_write = time.monotonic()
+                    continue
+                if not isinstance(since, int):
+                    since = version[1] - 1
+                # Short waits so a server shutdown ends the stream promptly
+                if not outbox.wait(since, 1.0) and time.monotonic() - last_write >= MCP_SERVER["stream_heartbeat"]:
+                    self.wfile.write(b": keep-alive\n\n")
+                    last_write = time.monotonic()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
     def do_POST(self):
         """Handle POST requests."""
+        try:
+            post_data = self._read_body()  # Always drain the body so the connection stays usable
+        except ValueError as e:
+            self.close_connection = True  # The rest of the body would be read as the next request
+            self._send_json(400, {"error": f"invalid request body: {e}"})
+            return
+        content_type = self.headers.get('Content-Type')
+        content_encoding = self.headers.get('Content-Encoding')
+
         if self.path == '/mcp_inbox':
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
             try:
-                message = json.loads(post_data.decode())
-                mcp_bridge.add_inbox_message(message)
-                mcp_bridge.process_mcp_inbox()
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({"status": "received"}).encode())
+                message, error = _check_item(mcp_codec.decode(post_data, content_type, content_encoding))
+                if error:
+                    self._send_json(400, {"error": error})
+                    return
+                # Only append to the inbox log; the bridge's worker publishes it
+                offset = mcp_bridge.add_inbox_message(message)
+                self._send_json(200, {"status": "received", "offset": offset})
                 
+            except mcp_codec.UnsupportedEncoding as e:
+                self._send_json(415, {"error": str(e)})
             except Exception as e:
-                self.send_response(400)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": str(e)}).encode())
+                self._send_json(400, {"error": str(e)})
+
+        elif self.path == '/mcp_inbox/batch':
+            try:
+                self._send_json(200, {"results": ingest_batch(post_data, content_type, content_encoding)})
+            except mcp_codec.UnsupportedEncoding as e:
+                self._send_json(415, {"error": str(e)})
+            except ValueError as e:  # Undecodable body or malformed JSON array
+                self._send_json(400, {"error": str(e)})
+
         else:
-            self.send_response(404)
-            self.end_headers()
+            self._send_body(404, b'', 'text/plain')
+
+def parse_since(value):
+    """``since`` is an integer offset or, failing that, a context_id."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def next_since(messages, since, version):
+    """Offset a client passes as ``since`` to continue after this page."""
+    if messages:
+        return messages[-1]["offset"]
+    return since if isinstance(since, int) else version[1] - 1
+
+def make_etag(messages, next_offset):
+    """Tag a page by the offsets it holds; offsets are never reused for other messages."""
+    # Weak: the same page may be sent as JSON, MessagePack or gzip
+    first = messages[0]["offset"] if messages else ""
+    return f'W/"{first}-{next_offset}-{len(messages)}"'
+
+def _check_item(item):
+    error = MCPBridge.message_error(item)
+    return (None, error) if error else (item, None)
+
+def parse_batch(body, content_type=None, content_encoding=None):
+    """Split a batch body into per-item ``(message, error)`` pairs.
+
+    The body is a JSON or MessagePack array, or NDJSON (one object per
+    line). A malformed NDJSON line only fails that item; a malformed
+    array raises ``ValueError``.
+    """
+    body = mcp_codec.inflate(body, content_encoding)
+    if mcp_codec.is_msgpack(content_type):
+        items = mcp_codec.decode(body, content_type)
+        if not isinstance(items, list):
+            raise ValueError("expected an array of messages")
+        return [_check_item(item) for item in items]
+
+    text = body.decode()
+    if text.lstrip().startswith('['):
+        return [_check_item(item) for item in json.loads(text)]
+
+    parsed = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            parsed.append(_check_item(json.loads(line)))
+        except json.JSONDecodeError as e:
+            parsed.append((None, f"invalid JSON: {e}"))
+    return parsed
+
+def ingest_batch(body, content_type=None, content_encoding=None):
+    """Append every valid item in one inbox write; returns one result per item."""
+    parsed = parse_batch(body, content_type, content_encoding)
+    offsets = iter(mcp_bridge.add_inbox_messages([message for message, error in parsed if error is None]))
+    results = []
+    for index, (message, error) in enumerate(parsed):
+        if error is None:
+            results.append({"index": index, "status": "received", "offset": next(offsets)})
+        else:
+            results.append({"index": index, "status": "error", "error": error})
+    return results
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a fixed worker pool and a bounded backlog.
+
+    Connections are handed to ``max_workers`` threads; up to ``max_queued``
+    more wait for a free worker. Past that the server answers 503 at once
+    instead of letting the backlog grow without limit. At most
+    ``max_streams`` workers (always fewer than ``max_workers``) may be held
+    by SSE streams and long-polls together.
+    """
+
+    def __init__(self, server_address, handler_class, max_workers=16, max_queued=64, max_streams=8):
+        super().__init__(server_address, handler_class)
+        self.stopping = threading.Event()  # Tells long-lived streams to finish
+        self.hold_slots = threading.BoundedSemaphore(max(0, min(max_streams, max_workers - 1)))
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-http")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def _reject(self, request):
+        try:
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def shutdown(self):
+        self.stopping.set()
+        super().shutdown()
+
+    def server_close(self):
+        self.stopping.set()
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+def create_mcp_server(host=MCP_SERVER["host"], port=MCP_SERVER["port"],
+                      max_workers=MCP_SERVER["max_workers"], max_queued=MCP_SERVER["max_queued"],
+                      max_streams=MCP_SERVER["max_streams"]):
+    """Build the endpoint server and start the bridge's inbox worker."""
+    mcp_bridge.start_inbox_worker()
+    return PooledHTTPServer((host, port), MCPHandler, max_workers, max_queued, max_streams)
 
-def start_mcp_server(port=8080):
+def start_mcp_server(port=MCP_SERVER["port"]):
     """Start MCP endpoint server."""
-    server = HTTPServer(('localhost', port), MCPHandler)
+    server = create_mcp_server(port=port)
     print(f"🌐 MCP Endpoints running on http://localhost:{port}")
-    print("  GET  /mcp_outbox - Get messages from bus")
+    print("  GET  /mcp_outbox - Get messages from bus (?since=&limit=&wait=)")
+    print("  GET  /mcp_outbox/stream - Server-Sent Events feed")
     print("  POST /mcp_inbox  - Send messages to bus")
+    print("  POST /mcp_inbox/batch - Send many messages (JSON array or NDJSON)")
     print("  GET  /health     - Health check")
     
     try:
@@ -81,6 +357,8 @@ def start_mcp_server(port=8080):
     except KeyboardInterrupt:
         print("\n🛑 MCP server stopped")
         server.shutdown()
+    finally:
+        server.server_close()
 
 if __name__ == "__main__":
-    start_mcp_server()
\ No newline at end of file
+    start_mcp_server()
@@ -9,26 +9,21 @@ def print_event(message):
     print(f"[{message['timestamp']}] {message['event_type']}: {json.dumps(message['data'], indent=2)}")
 
 def main():
-    """Monitor bus events via file watching."""
+    """Monitor bus events by long-polling the event log."""
     print("🚌 Sovereign Bus Monitor Started")
     print("Monitoring for NEW events only...")
     
-    # Start from current message count (ignore history)
-    last_count = len(bus.get_messages())
-    print(f"Ignoring {last_count} historical events")
+    # Start from the current end of the log (ignore history)
+    offset = bus.event_log.next_offset
+    print(f"Skipping history, starting at offset {offset}")
     
     try:
-        import time
         while True:
-            messages = bus.get_messages()
-            if len(messages) > last_count:
-                # Show only new messages
-                for msg in messages[last_count:]:
-                    print_event(msg)
-                last_count = len(messages)
-            time.sleep(1)
+            messages, offset = bus.poll(offset, timeout=5.0)
+            for msg in messages:
+                print_event(msg)
     except KeyboardInterrupt:
         print("\n🛑 Bus monitor stopped")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
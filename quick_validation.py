@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """Quick system validation without timeouts."""
 
+import glob
 import json
 import os
 import pandas as pd
 import requests
 from datetime import datetime
+from core.sovereign_bus import SovereignBus
 
 def validate_system():
     """Validate all system components."""
@@ -17,8 +19,7 @@ def validate_system():
     # 1. Event Bus Validation
     print("\n🚌 Event Bus Status:")
     try:
-        with open("bus_events.json", 'r') as f:
-            bus_events = json.load(f)
+        bus_events = SovereignBus().get_messages()
         
         event_types = list(set([e["event_type"] for e in bus_events[-20:]]))
         
@@ -110,8 +111,7 @@ def validate_system():
     # Check if agents are publishing to bus
     agent_events = {}
     try:
-        with open("bus_events.json", 'r') as f:
-            events = json.load(f)
+        events = SovereignBus().get_messages()
         
         for event in events[-50:]:  # Last 50 events
             event_type = event["event_type"]
@@ -137,7 +137,9 @@ def validate_system():
     print("\n⚡ Real-time Features:")
     
     # Check if files are being updated
-    files_to_check = ["bus_events.json", "mcp_outbox.json", "insightflow/telemetry.json"]
+    bus_segments = sorted(glob.glob("bus_events/*.jsonl"))
+    bus_file = bus_segments[-1] if bus_segments else "bus_events"
+    files_to_check = [bus_file, "mcp_outbox.json", "insightflow/telemetry.json"]
     recent_updates = 0
     
     for file_path in files_to_check:
@@ -28,6 +28,15 @@ class TestBaseAgent(unittest.TestCase):
         self.assertEqual(len(df), 1)
         self.assertEqual(df.iloc[0]["test_field"], "test_value")
     
+    def test_buffered_log_flushed_on_exit(self):
+        self.agent.close()
+        self.agent.csv_log.flush_every = 0
+        with self.agent:
+            self.agent._log_entry({"test_field": "a"})
+            self.agent._log_entry({"test_field": "b"})
+        df = pd.read_csv(self.log_file)
+        self.assertEqual(list(df["test_field"]), ["a", "b"])
+    
     def test_safe_read_csv(self):
         df = self.agent._safe_read_csv("nonexistent.csv")
         self.assertTrue(df.empty)
@@ -37,5 +46,14 @@ class TestBaseAgent(unittest.TestCase):
         df = self.agent._safe_read_csv(self.log_file)
         self.assertFalse(df.empty)
 
+    def test_tail_csv(self):
+        reader = self.agent._tail_csv(self.log_file)
+        self.assertIsNone(reader.last_row())
+        self.agent._log_entry({"test_field": "a"})
+        self.agent._log_entry({"test_field": "b"})
+        reader = self.agent._tail_csv(self.log_file)
+        self.assertEqual(reader.last_row()["test_field"], "b")
+        self.assertIs(self.agent._tail_csv(self.log_file), reader)  # Reused across checks
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
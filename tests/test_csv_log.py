@@ -0,0 +1,65 @@
+import csv
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from core.csv_log import BufferedCSVWriter
+
+class TestBufferedCSVWriter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "logs", "agent.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_rows(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline='') as f:
+            return list(csv.reader(f))
+
+    def test_flush_every_row(self):
+        writer = BufferedCSVWriter(self.path, ["timestamp", "status"])
+        writer.write({"timestamp": "t1", "status": "success"})
+        self.assertEqual(self.read_rows(), [["t1", "success"]])
+        file = writer._file
+        writer.write({"timestamp": "t2", "status": "failure"})
+        self.assertIs(writer._file, file)  # Same handle, not reopened per row
+        self.assertEqual(len(self.read_rows()), 2)
+        writer.close()
+
+    def test_flush_every_n_rows(self):
+        writer = BufferedCSVWriter(self.path, ["n"], flush_every=3)
+        writer.write({"n": 1})
+        writer.write({"n": 2})
+        self.assertEqual(self.read_rows(), [])
+        writer.write({"n": 3})
+        self.assertEqual(self.read_rows(), [["1"], ["2"], ["3"]])
+        writer.close()
+
+    def test_flush_interval(self):
+        writer = BufferedCSVWriter(self.path, ["n"], flush_every=0, flush_interval=0.02)
+        writer.write({"n": 1})
+        for _ in range(100):
+            if self.read_rows():
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.read_rows(), [["1"]])
+        writer.close()
+
+    def test_context_manager_and_reopen(self):
+        with BufferedCSVWriter(self.path, ["n"], flush_every=0) as writer:
+            writer.write({"n": 1})
+            self.assertEqual(self.read_rows(), [])
+        self.assertEqual(self.read_rows(), [["1"]])
+        self.assertIsNone(writer._file)
+
+        writer.write({"n": 2})  # Reopens in append mode
+        writer.flush()
+        self.assertEqual(self.read_rows(), [["1"], ["2"]])
+        writer.close()
+
+if __name__ == "__main__":
+    unittest.main()
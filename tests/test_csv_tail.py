@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from core.csv_tail import TailingCSVReader
+
+class TestTailingCSVReader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "data.csv")
+        self.write("w", "student,score\n")
+        self.reader = TailingCSVReader(self.path, keep=3, aggregate=("score",))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, mode, text):
+        with open(self.path, mode, newline='') as f:
+            f.write(text)
+
+    def test_parses_only_appended_rows(self):
+        self.write("a", "a,50\nb,70\n")
+        self.assertEqual(self.reader.refresh(), 2)
+        self.write("a", "c,n/a\nd,30\n")
+        self.assertEqual(self.reader.refresh(), 2)
+        self.assertEqual(self.reader.refresh(), 0)
+
+        self.assertEqual(self.reader.row_count, 4)
+        self.assertEqual(self.reader.last_row(), {"student": "d", "score": "30"})
+        self.assertEqual([r["student"] for r in self.reader.tail(5)], ["b", "c", "d"])  # keep=3
+        self.assertEqual(self.reader.mean("score"), 50.0)  # Non-numbers skipped
+        self.assertEqual(self.reader.stats("score").maximum, 70.0)
+        self.assertEqual(self.reader.reparses, 0)
+
+    def test_partial_line_waits_for_newline(self):
+        self.write("a", "a,4")
+        self.assertEqual(self.reader.refresh(), 0)
+        self.write("a", "0\n")
+        self.assertEqual(self.reader.refresh(), 1)
+        self.assertEqual(self.reader.last_row()["score"], "40")
+
+    def test_truncation_reparses(self):
+        self.write("a", "a,50\nb,70\n")
+        self.reader.refresh()
+        self.write("w", "student,score\nz,10\n")
+        self.reader.refresh()
+        self.assertEqual(self.reader.reparses, 1)
+        self.assertEqual(self.reader.row_count, 1)
+        self.assertEqual(self.reader.mean("score"), 10.0)
+
+    def test_in_place_rewrite_reparses(self):
+        self.write("a", "a,50\n")
+        self.reader.refresh()
+        self.write("w", "student,score\nx,90\ny,80\n")  # Same inode, longer file
+        self.reader.refresh()
+        self.assertEqual(self.reader.reparses, 1)
+        self.assertEqual([r["student"] for r in self.reader.tail(3)], ["x", "y"])
+
+    def test_rotation_reparses(self):
+        self.write("a", "a,50\n")
+        self.reader.refresh()
+        rotated = self.path + ".1"
+        os.rename(self.path, rotated)
+        self.write("w", "student,score\nb,20\n")
+        self.reader.refresh()
+        self.assertEqual(self.reader.reparses, 1)
+        self.assertEqual(self.reader.mean("score"), 20.0)
+
+    def test_missing_file_reads_empty(self):
+        self.write("a", "a,50\n")
+        self.reader.refresh()
+        os.remove(self.path)
+        self.assertEqual(self.reader.refresh(), 0)
+        self.assertIsNone(self.reader.last_row())
+        self.assertEqual(self.reader.row_count, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import tempfile
+import os
+import threading
+import time
+from core.dispatcher import PooledDispatcher, SyncDispatcher, make_dispatcher
+from core.realtime_bus import RealtimeBus
+
+class TestPooledDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = None
+
+    def tearDown(self):
+        if self.dispatcher:
+            self.dispatcher.shutdown(wait=False)
+
+    def test_preserves_order_per_subscriber(self):
+        self.dispatcher = PooledDispatcher(max_workers=4, batch_size=3)
+        received = []
+        for i in range(50):
+            self.dispatcher.dispatch([received.append], {"i": i})
+
+        self.assertTrue(self.dispatcher.flush(timeout=5))
+        self.assertEqual([m["i"] for m in received], list(range(50)))
+
+    def test_slow_subscriber_does_not_block_publisher(self):
+        self.dispatcher = PooledDispatcher(max_workers=2, queue_size=100)
+        release = threading.Event()
+        fast = []
+
+        def slow(message):
+            release.wait(5)
+
+        start = time.monotonic()
+        for i in range(20):
+            self.dispatcher.dispatch([slow, fast.append], {"i": i})
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 1.0)
+        release.set()
+        self.assertTrue(self.dispatcher.flush(timeout=5))
+        self.assertEqual(len(fast), 20)
+
+    def _fill_blocked(self, policy):
+        self.dispatcher = PooledDispatcher(max_workers=1, queue_size=2, policy=policy)
+        release = threading.Event()
+        received = []
+
+        def subscriber(message):
+            release.wait(5)
+            received.append(message["i"])
+
+        for i in range(6):
+            self.dispatcher.dispatch([subscriber], {"i": i})
+            time.sleep(0.01)
+        stats = self.dispatcher.get_stats()["subscribers"]
+        release.set()
+        self.dispatcher.flush(timeout=5)
+        return received, next(iter(stats.values()))
+
+    def test_drop_newest(self):
+        received, stats = self._fill_blocked("drop_newest")
+        self.assertEqual(received, [0, 1, 2])
+        self.assertEqual(stats["dropped"], 3)
+        self.assertEqual(stats["lag"], 2)
+
+    def test_drop_oldest(self):
+        received, stats = self._fill_blocked("drop_oldest")
+        self.assertEqual(received, [0, 4, 5])
+        self.assertEqual(stats["dropped"], 3)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            PooledDispatcher(policy="spill")
+
+    def test_make_dispatcher(self):
+        self.assertIsInstance(make_dispatcher("sync"), SyncDispatcher)
+        self.dispatcher = make_dispatcher("pooled", max_workers=1)
+        self.assertEqual(self.dispatcher.get_stats()["mode"], "pooled")
+
+    def test_bus_with_pooled_dispatch(self):
+        self.dispatcher = PooledDispatcher()
+        performance_log = os.path.join(tempfile.mkdtemp(), "performance_log.csv")
+        bus = RealtimeBus(dispatcher=self.dispatcher, performance_log=performance_log)
+        received = []
+        bus.subscribe("deployments", received.append)
+        bus.publish("deployments", {"status": "success"})
+
+        self.dispatcher.flush(timeout=5)
+        self.assertEqual(len(received), 1)
+        subscribers = bus.get_stats()["dispatch"]["subscribers"]
+        self.assertEqual([s["delivered"] for s in subscribers.values()], [1])
+
+if __name__ == "__main__":
+    unittest.main()
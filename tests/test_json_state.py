@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from core.json_state import JsonStateFile, StaleStateError
+
+def _append_many(path, worker, count):
+    state = JsonStateFile(path)
+    for n in range(count):
+        state.update(lambda items: items + [f"{worker}-{n}"])
+
+class TestJsonStateFile(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_missing_and_corrupt_read_as_default(self):
+        state = JsonStateFile(self.path, default=dict)
+        self.assertEqual(state.read(), {})
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(state.read(), {})
+        state.ensure()
+        self.assertEqual(state.read_versioned()[0], {})
+
+    def test_stale_write_is_rejected(self):
+        state = JsonStateFile(self.path)
+        state.write([1])
+        data, version = state.read_versioned()
+        JsonStateFile(self.path).write([1, 2])
+
+        with self.assertRaises(StaleStateError):
+            state.write(data + [3], expected_version=version)
+        self.assertEqual(state.read(), [1, 2])
+
+        data, version = state.read_versioned()
+        state.write(data + [3], expected_version=version)
+        self.assertEqual(state.read(), [1, 2, 3])
+
+    def test_concurrent_processes_do_not_lose_updates(self):
+        workers = [
+            multiprocessing.Process(target=_append_many, args=(self.path, worker, 25))
+            for worker in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(JsonStateFile(self.path).read()), 100)
+
+    def test_no_temp_files_left_behind(self):
+        JsonStateFile(self.path).update(lambda items: items + [1])
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["state.json", "state.json.lock"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+from core.coalescer import CoalescingForwarder
+from core.mcp_adapter import MCPAdapter
+from core.mcp_manager import MCPManager
+from core.sovereign_bus import SovereignBus
+
+def use_private_bus(test, temp_dir):
+    """Point the adapter at a temp-dir bus so tests never touch bus_events/ or the global bridge."""
+    test.bus = SovereignBus(log_dir=os.path.join(temp_dir, "bus"), legacy_file=None)
+    patcher = mock.patch("core.mcp_adapter.bus", test.bus)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    test.addCleanup(test.bus.event_log.close)
+
+class TestMCPAdapterForwarding(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = MCPManager(os.path.join(self.temp_dir, "messages.db"))
+        use_private_bus(self, self.temp_dir)
+        self.adapters = []
+
+    def tearDown(self):
+        for adapter in self.adapters:
+            adapter.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _adapter(self, **options):
+        adapter = MCPAdapter(self.manager, forwarder_options=options)
+        self.adapters.append(adapter)
+        return adapter
+
+    def test_events_are_written_in_one_batch(self):
+        adapter = self._adapter(max_delay=60)
+        for n in range(10):
+            self.bus.publish("deploy.success", {"n": n})
+        self.assertEqual(self.manager.read_messages("mcp_agents"), [])
+
+        adapter.forwarder.flush()
+        inbox = self.manager.read_messages("mcp_agents")
+        self.assertEqual([m["content"]["data"]["n"] for m in inbox], list(range(10)))
+        stats = adapter.get_forwarding_stats()
+        self.assertEqual((stats["batches"], stats["max_batch_size"]), (1, 10))
+
+    def test_full_batch_is_written_without_waiting(self):
+        adapter = self._adapter(max_delay=60, max_batch=5)
+        for n in range(5):
+            self.bus.publish("deploy.success", {"n": n})
+        for _ in range(200):
+            if adapter.get_forwarding_stats()["forwarded"] == 5:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.manager.read_messages("mcp_agents")), 5)
+
+    def test_window_expiry_flushes(self):
+        adapter = self._adapter(max_delay=0.02)
+        self.bus.publish("deploy.success", {"n": 1})
+        for _ in range(200):
+            if self.manager.read_messages("mcp_agents"):
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.manager.read_messages("mcp_agents")), 1)
+        self.assertGreater(adapter.get_forwarding_stats()["flush_latency_max_ms"], 0)
+
+    def test_superseded_rl_updates_collapse(self):
+        adapter = self._adapter(max_delay=60)
+        for reward in (0.1, 0.2, 0.3):
+            self.bus.publish("rl.learned", {"state": "high_latency", "action": "restart", "reward": reward})
+        self.bus.publish("rl.learned", {"state": "high_latency", "action": "rollback", "reward": 0.5})
+        self.bus.publish("deploy.success", {"n": 1})
+        adapter.forwarder.flush()
+
+        inbox = self.manager.read_messages("mcp_agents")
+        self.assertEqual([(m["content"]["event_type"], m["content"]["data"].get("reward")) for m in inbox],
+                         [("rl.learned", 0.3), ("rl.learned", 0.5), ("deploy.success", None)])
+        self.assertEqual(adapter.get_forwarding_stats()["collapsed"], 2)
+
+    def _fail_writes(self, store, method, error, times=1):
+        original = getattr(store, method)
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(1)
+            if len(calls) <= times:
+                raise error
+            return original(*args, **kwargs)
+        patcher = mock.patch.object(store, method, flaky)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_sqlite_write_is_retried(self):
+        adapter = self._adapter(max_delay=60)
+        self._fail_writes(self.manager.store, "_connect", sqlite3.OperationalError("database is locked"))
+        self.bus.publish("deploy.success", {"n": 1})
+        adapter.forwarder.flush()
+        stats = adapter.get_forwarding_stats()
+        self.assertEqual((stats["forwarded"], stats["failures"], stats["pending"]), (0, 1, 1))
+
+        adapter.forwarder.flush()
+        self.assertEqual(len(self.manager.read_messages("mcp_agents")), 1)
+        self.assertEqual(adapter.get_forwarding_stats()["forwarded"], 1)
+
+    def test_failed_json_write_is_retried(self):
+        manager = MCPManager(os.path.join(self.temp_dir, "messages.json"))
+        adapter = MCPAdapter(manager, forwarder_options={"max_delay": 60})
+        self.adapters.append(adapter)
+        self._fail_writes(manager.store.state, "write", IOError("disk full"))
+        self.bus.publish("deploy.success", {"n": 1})
+        adapter.forwarder.flush()
+        self.assertEqual(adapter.get_forwarding_stats()["failures"], 1)
+        adapter.forwarder.flush()
+        self.assertEqual(len(manager.read_messages("mcp_agents")), 1)
+
+    def test_collapse_can_be_disabled(self):
+        adapter = self._adapter(max_delay=60, collapse_superseded=False)
+        for reward in (0.1, 0.2):
+            self.bus.publish("rl.learned", {"state": "s", "action": "a", "reward": reward})
+        adapter.forwarder.flush()
+        self.assertEqual(len(self.manager.read_messages("mcp_agents")), 2)
+
+class TestCoalescingForwarderFailures(unittest.TestCase):
+    def setUp(self):
+        self.written = []
+        self.failing = 0
+
+    def sink(self, items):
+        if self.failing:
+            self.failing -= 1
+            raise IOError("database is locked")
+        self.written.extend(items)
+
+    def test_failed_batch_is_retried(self):
+        forwarder = CoalescingForwarder(self.sink, max_delay=60, collapse_key=lambda item: item.get("key"))
+        self.failing = 1
+        forwarder.submit({"n": 1, "key": "a"})
+        forwarder.submit({"n": 2})
+        forwarder.flush()
+        self.assertEqual(self.written, [])
+        forwarder.submit({"n": 3, "key": "a"})  # Supersedes the unwritten n=1
+        forwarder.flush()
+        self.assertEqual([item["n"] for item in self.written], [2, 3])
+        stats = forwarder.stats()
+        self.assertEqual((stats["failures"], stats["dropped"], stats["forwarded"]), (1, 0, 2))
+        forwarder.close()
+
+    def test_items_dropped_after_max_retries(self):
+        forwarder = CoalescingForwarder(self.sink, max_delay=60, max_retries=2)
+        self.failing = 3
+        forwarder.submit({"n": 1})
+        for _ in range(3):
+            forwarder.flush()
+        forwarder.flush()
+        self.assertEqual(self.written, [])
+        stats = forwarder.stats()
+        self.assertEqual((stats["failures"], stats["dropped"], stats["pending"]), (3, 1, 0))
+        forwarder.close()
+
+class TestMCPAdapterPolling(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = MCPManager(os.path.join(self.temp_dir, "messages.db"))
+        use_private_bus(self, self.temp_dir)
+        self.adapter = MCPAdapter(self.manager, batch_size=2)
+        self.published = []
+        self.bus.subscribe("external.*", self.published.append)
+
+    def tearDown(self):
+        self.adapter.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _send(self, n):
+        return self.manager.send_message("mcp_agent", "sovereign_bus", {"event_type": "external.alert", "data": {"n": n}})
+
+    def test_each_message_published_once(self):
+        for n in range(3):
+            self._send(n)
+        self.assertEqual(self.adapter.process_mcp_messages(), 3)  # Two batches of at most 2
+        self.assertEqual(self.adapter.process_mcp_messages(), 0)
+
+        self.assertEqual([m["data"]["n"] for m in self.published], [0, 1, 2])
+        self.assertEqual(self.published[0]["data"]["mcp_sender"], "mcp_agent")
+        self.assertEqual(self.manager.read_unprocessed_messages("sovereign_bus"), [])
+
+    def test_malformed_messages_are_skipped(self):
+        self.manager.send_message("mcp_agent", "sovereign_bus", "plain string")
+        self.manager.send_message("mcp_agent", "sovereign_bus", {"event_type": "external.alert", "data": [1]})
+        self._send(1)
+        self.assertEqual(self.adapter.process_mcp_messages(), 1)
+        self.assertEqual([m["data"]["n"] for m in self.published], [1])
+        self.assertEqual(self.manager.read_unprocessed_messages("sovereign_bus"), [])
+        self.assertEqual(self.adapter.process_mcp_messages(), 0)
+
+    def test_messages_from_the_past_are_not_skipped(self):
+        message_id = self._send(1)
+        self.manager.store._connect().execute("UPDATE messages SET timestamp = 0 WHERE id = ?", (message_id,))
+        self.manager.store._connect().commit()
+        self.adapter.process_mcp_messages()
+        self.assertEqual(len(self.published), 1)
+
+    def test_restart_resumes_from_cursor(self):
+        self._send(1)
+        self.adapter.process_mcp_messages()
+        self.adapter.close()
+
+        self._send(2)
+        self.adapter = MCPAdapter(self.manager)
+        self.adapter.process_mcp_messages()
+        self.assertEqual([m["data"]["n"] for m in self.published], [1, 2])
+
+    def test_acknowledged_messages_are_skipped(self):
+        message_id = self._send(1)
+        self.manager.mark_processed(message_id)  # Acked, but the cursor was never saved
+        self._send(2)
+        self.adapter.process_mcp_messages()
+        self.assertEqual([m["data"]["n"] for m in self.published], [2])
+
+    def test_background_poller(self):
+        self.adapter.start_polling(min_interval=0.01, max_interval=0.05)
+        for n in range(5):
+            self._send(n)
+        for _ in range(300):
+            if len(self.published) == 5:
+                break
+            time.sleep(0.01)
+        self.assertEqual([m["data"]["n"] for m in self.published], list(range(5)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from core.mcp_bridge import MCPBridge
+from core.mcp_outbox import BufferedOutbox
+from core.sovereign_bus import SovereignBus
+
+class TestMCPBridgeInbox(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # A private bus: the global one logs to bus_events/ and feeds the module-level bridge
+        self.bus = SovereignBus(log_dir=os.path.join(self.temp_dir, "bus"), legacy_file=None)
+        patcher = mock.patch("core.mcp_bridge.bus", self.bus)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.published = []
+        self.bus.subscribe("external.*", self.published.append)
+        self.bridge = self._bridge()
+
+    def tearDown(self):
+        self.bridge.close()
+        self.bus.event_log.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _bridge(self, **options):
+        return MCPBridge(
+            inbox_path=os.path.join(self.temp_dir, "mcp_inbox.json"),
+            outbox_path=os.path.join(self.temp_dir, "mcp_outbox.json"),
+            inbox_dir=os.path.join(self.temp_dir, "mcp_inbox"),
+            **options
+        )
+
+    def _message(self, n):
+        return {"context_id": f"ctx_{n}", "event_type": "external.alert", "payload": {"n": n}}
+
+    def test_only_new_messages_are_processed(self):
+        self.bridge.add_inbox_message(self._message(1))
+        self.assertEqual(self.bridge.process_mcp_inbox(), 1)
+        self.assertEqual(self.bridge.process_mcp_inbox(), 0)
+
+        self.bridge.add_inbox_message(self._message(2))
+        self.assertEqual(self.bridge.process_mcp_inbox(), 1)
+        self.assertEqual([m["data"]["n"] for m in self.published], [1, 2])
+        self.assertEqual(self.published[0]["data"]["mcp_context_id"], "ctx_1")
+
+    def test_bridges_sharing_an_inbox_publish_once(self):
+        other = self._bridge(batch_size=7)
+        self.addCleanup(other.close)
+        self.bridge.batch_size = 7
+        self.bridge.add_inbox_messages([self._message(n) for n in range(200)])
+        workers = [threading.Thread(target=bridge.process_mcp_inbox) for bridge in (self.bridge, other) * 3]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sorted(m["data"]["n"] for m in self.published), list(range(200)))
+
+    def test_unpublishable_message_is_skipped(self):
+        self.bridge.add_inbox_messages([self._message(1), {"event_type": "external.alert", "payload": "bad"},
+                                        self._message(2)])
+        self.assertEqual(self.bridge.process_mcp_inbox(), 2)
+        self.assertEqual(self.bridge.inbox.committed(MCPBridge.CONSUMER_GROUP), 3)
+        self.assertEqual([m["data"]["n"] for m in self.published], [1, 2])
+
+    def test_watermark_survives_restart(self):
+        self.bridge.add_inbox_message(self._message(1))
+        self.bridge.process_mcp_inbox()
+        self.bridge.add_inbox_message(self._message(2))
+        self.bridge.close()
+
+        self.bridge = self._bridge()
+        self.assertEqual(self.bridge.process_mcp_inbox(), 1)
+        self.assertEqual([m["data"]["n"] for m in self.published], [1, 2])
+
+    def test_compaction_drops_processed_segments(self):
+        self.bridge.close()
+        self.bridge = self._bridge(inbox_segment_bytes=200, compact_interval=0)
+        for n in range(10):
+            self.bridge.add_inbox_message(self._message(n))
+        self.bridge.process_mcp_inbox()
+        segments = [f for f in os.listdir(self.bridge.inbox.directory) if f.endswith(".jsonl")]
+        self.assertEqual(len(segments), 1)
+        self.assertGreater(self.bridge.inbox.first_offset, 0)
+        self.assertEqual(len(self.published), 10)
+
+    def test_unprocessed_messages_survive_segment_rollover(self):
+        self.bridge.close()
+        self.bridge = self._bridge(inbox_segment_bytes=200, compact_interval=3600)
+        self.bridge.add_inbox_messages([self._message(n) for n in range(300)])
+        self.assertEqual(self.bridge.inbox.first_offset, 0)
+        self.assertEqual(self.bridge.process_mcp_inbox(), 300)
+        self.assertEqual([m["data"]["n"] for m in self.published], list(range(300)))
+
+    def test_bus_events_reach_outbox_memory(self):
+        self.bus.publish("deploy.success", {"n": 1})
+        outbox = self.bridge.get_outbox_messages()
+        self.assertEqual(outbox[-1]["event_type"], "deploy.success")
+        self.assertEqual(outbox[-1]["payload"], {"n": 1})
+
+    def test_imports_unprocessed_legacy_inbox(self):
+        self.bridge.close()
+        shutil.rmtree(os.path.join(self.temp_dir, "mcp_inbox"))
+        with open(os.path.join(self.temp_dir, "mcp_inbox.json"), "w") as f:
+            json.dump([dict(self._message(1), processed=True), self._message(2)], f)
+
+        self.bridge = self._bridge()
+        self.bridge.process_mcp_inbox()
+        self.assertEqual([m["data"]["n"] for m in self.published], [2])
+
+class TestBufferedOutbox(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "mcp_outbox.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read_file(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_ring_buffer_keeps_newest(self):
+        outbox = BufferedOutbox(self.path, capacity=3, flush_interval=60)
+        for n in range(5):
+            outbox.append({"n": n})
+        self.assertEqual([m["n"] for m in outbox.snapshot()], [2, 3, 4])
+        outbox.close()
+        self.assertEqual([m["n"] for m in self._read_file()], [2, 3, 4])
+
+    def test_size_threshold_wakes_writer(self):
+        outbox = BufferedOutbox(self.path, flush_interval=60, flush_every=2)
+        outbox.append({"n": 0})
+        outbox.append({"n": 1})
+        for _ in range(100):
+            if self._read_file():
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self._read_file()), 2)
+        outbox.close()
+
+    def test_reload_from_disk(self):
+        outbox = BufferedOutbox(self.path)
+        outbox.append({"n": 1})
+        outbox.close()
+        self.assertEqual(BufferedOutbox(self.path).snapshot(), [{"n": 1, "offset": 0}])
+
+    def test_offsets_and_read_since(self):
+        outbox = BufferedOutbox(self.path, capacity=3)
+        for n in range(5):
+            outbox.append({"context_id": f"ctx_{n}"})
+        messages, version = outbox.read_since()
+        self.assertEqual([m["offset"] for m in messages], [2, 3, 4])
+        self.assertEqual(version, (2, 5))
+        self.assertEqual([m["offset"] for m in outbox.read_since(3)[0]], [4])
+        self.assertEqual([m["offset"] for m in outbox.read_since("ctx_2", limit=1)[0]], [3])
+        self.assertEqual(len(outbox.read_since("ctx_evicted")[0]), 3)
+        outbox.close()
+
+    def test_legacy_entries_get_offsets(self):
+        with open(self.path, "w") as f:
+            json.dump([{"context_id": "a"}, {"context_id": "b"}], f)
+        outbox = BufferedOutbox(self.path)
+        outbox.append({"context_id": "c"})
+        self.assertEqual([m["offset"] for m in outbox.snapshot()], [0, 1, 2])
+        outbox.close()
+
+    def test_wait(self):
+        outbox = BufferedOutbox(self.path)
+        self.assertFalse(outbox.wait(-1, timeout=0.05))
+        threading.Timer(0.05, outbox.append, args=({"n": 1},)).start()
+        self.assertTrue(outbox.wait(-1, timeout=5))
+        outbox.close()
+
+    def test_fresh_file_first_flush_skips_merge(self):
+        outbox = BufferedOutbox(self.path)
+        self.assertEqual(self._read_file(), [])
+        outbox.append({"n": 1})
+        with mock.patch.object(outbox, "_merge") as merge:
+            outbox.flush()
+        merge.assert_not_called()
+        self.assertEqual(self._read_file(), [{"n": 1, "offset": 0}])
+        outbox.close()
+
+    def test_concurrent_writers_merge(self):
+        first = BufferedOutbox(self.path)
+        second = BufferedOutbox(self.path)
+        first.append({"n": "first_0"})
+        first.append({"n": "first_1"})
+        second.append({"n": "second_0"})
+        first.flush()
+        second.flush()
+        self.assertEqual([(m["n"], m["offset"]) for m in self._read_file()],
+                         [("first_0", 0), ("first_1", 1), ("second_0", 2)])
+        self.assertEqual([m["offset"] for m in second.snapshot()], [0, 1, 2])
+        self.assertEqual([m["n"] for m in first.snapshot()], ["first_0", "first_1", "second_0"])
+        first.close()
+        second.close()
+
+    def test_reader_sees_other_writer(self):
+        reader = BufferedOutbox(self.path)
+        writer = BufferedOutbox(self.path)
+        writer.append({"n": 1})
+        writer.flush()
+        self.assertEqual(reader.snapshot(), [{"n": 1, "offset": 0}])
+        writer.close()
+
+if __name__ == "__main__":
+    unittest.main()
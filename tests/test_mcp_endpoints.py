@@ -0,0 +1,292 @@
+import gzip
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import mcp_endpoints
+from core import mcp_codec
+from core.mcp_bridge import MCPBridge
+from core.sovereign_bus import SovereignBus
+
+class TestMCPEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.bus = SovereignBus(log_dir=os.path.join(self.temp_dir, "bus"), legacy_file=None)
+        bus_patcher = mock.patch("core.mcp_bridge.bus", self.bus)
+        bus_patcher.start()
+        self.addCleanup(bus_patcher.stop)
+        self.bridge = MCPBridge(
+            inbox_path=None,
+            outbox_path=os.path.join(self.temp_dir, "mcp_outbox.json"),
+            inbox_dir=os.path.join(self.temp_dir, "mcp_inbox"),
+        )
+        patcher = mock.patch.object(mcp_endpoints, "mcp_bridge", self.bridge)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.server = mcp_endpoints.create_mcp_server(port=0, max_workers=2, max_queued=0)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.bridge.close()
+        self.bus.event_log.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _connect(self):
+        return http.client.HTTPConnection("localhost", self.port, timeout=5)
+
+    def test_keep_alive_serves_several_requests(self):
+        conn = self._connect()
+        for _ in range(3):
+            conn.request("GET", "/health")
+            response = conn.getresponse()
+            self.assertEqual(json.loads(response.read()), {"status": "ok"})
+        conn.request("GET", "/missing")
+        self.assertEqual(conn.getresponse().status, 404)
+        conn.close()
+
+    def test_post_enqueues_and_worker_publishes(self):
+        published = []
+        self.bus.subscribe("external.alert", published.append)
+
+        conn = self._connect()
+        body = json.dumps({"context_id": "ctx_1", "event_type": "external.alert", "payload": {"n": 1}})
+        conn.request("POST", "/mcp_inbox", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.read())["status"], "received")
+        conn.close()
+
+        for _ in range(200):
+            if published:
+                break
+            time.sleep(0.01)
+        self.assertEqual(published[0]["data"]["mcp_context_id"], "ctx_1")
+
+    def test_post_rejects_non_object_payload(self):
+        conn = self._connect()
+        conn.request("POST", "/mcp_inbox", json.dumps({"event_type": "external.alert", "payload": [1]}))
+        response = conn.getresponse()
+        self.assertEqual(response.status, 400)
+        self.assertIn("payload", json.loads(response.read())["error"])
+        conn.close()
+        self.assertEqual(self.bridge.inbox.next_offset, 0)
+
+    def _post_batch(self, body):
+        conn = self._connect()
+        conn.request("POST", "/mcp_inbox/batch", body)
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    def test_batch_json_array(self):
+        messages = [{"event_type": "external.alert", "payload": {"n": n}} for n in range(3)]
+        status, payload = self._post_batch(json.dumps(messages + [42, {"payload": "text"}]))
+        self.assertEqual(status, 200)
+        self.assertEqual([r["status"] for r in payload["results"]], ["received"] * 3 + ["error"] * 2)
+        self.assertEqual([r["offset"] for r in payload["results"][:3]], [0, 1, 2])
+        self.assertEqual(self.bridge.inbox.next_offset, 3)
+
+    def test_batch_ndjson_reports_bad_lines(self):
+        body = '{"event_type": "external.alert"}\n{broken\n\n{"event_type": "external.alert"}\n'
+        status, payload = self._post_batch(body)
+        self.assertEqual(status, 200)
+        self.assertEqual([r["index"] for r in payload["results"]], [0, 1, 2])
+        self.assertEqual([r["status"] for r in payload["results"]], ["received", "error", "received"])
+        self.assertEqual(payload["results"][2]["offset"], 1)
+
+    def test_batch_chunked_ndjson(self):
+        lines = [json.dumps({"event_type": "external.alert", "payload": {"n": n}}).encode() + b"\n" for n in range(3)]
+        conn = self._connect()
+        conn.request("POST", "/mcp_inbox/batch", iter(lines), encode_chunked=True)
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        self.assertEqual([r["offset"] for r in payload["results"]], [0, 1, 2])
+
+        conn.request("GET", "/health")  # Connection is still in sync
+        self.assertEqual(json.loads(conn.getresponse().read()), {"status": "ok"})
+        conn.close()
+
+    def test_malformed_chunked_body_is_rejected(self):
+        with socket.create_connection(("localhost", self.port), timeout=5) as sock:
+            sock.sendall(b"POST /mcp_inbox/batch HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n")
+            self.assertTrue(sock.recv(1024).startswith(b"HTTP/1.1 400"))
+
+    def test_malformed_batch_array_is_rejected(self):
+        status, payload = self._post_batch('[{"event_type": ')
+        self.assertEqual(status, 400)
+        self.assertIn("error", payload)
+
+    def _get(self, path, headers=None):
+        conn = self._connect()
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, json.loads(body) if body else None
+
+    def _fill_outbox(self, count):
+        for n in range(count):
+            self.bridge.outbox.append({"context_id": f"ctx_{n}", "event_type": "deploy.success", "payload": {"n": n}})
+
+    def test_outbox_pagination(self):
+        self._fill_outbox(5)
+        response, page = self._get("/mcp_outbox?since=1&limit=2")
+        self.assertEqual([m["offset"] for m in page], [2, 3])
+        self.assertEqual(response.getheader("X-Next-Since"), "3")
+
+        _, page = self._get("/mcp_outbox?since=ctx_3")
+        self.assertEqual([m["context_id"] for m in page], ["ctx_4"])
+        _, page = self._get("/mcp_outbox")
+        self.assertEqual(len(page), 5)
+
+    def test_outbox_etag_returns_304(self):
+        self._fill_outbox(2)
+        response, _ = self._get("/mcp_outbox")
+        etag = response.getheader("ETag")
+        response, body = self._get("/mcp_outbox", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertIsNone(body)
+
+        self._fill_outbox(1)
+        response, _ = self._get("/mcp_outbox", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+
+    def test_paging_with_if_none_match(self):
+        self._fill_outbox(30)
+        response, page = self._get("/mcp_outbox?since=-1&limit=10")
+        etag, since = response.getheader("ETag"), response.getheader("X-Next-Since")
+        self.assertEqual(since, "9")
+
+        started = time.monotonic()
+        response, page = self._get(f"/mcp_outbox?since={since}&limit=10&wait=5", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertEqual([m["offset"] for m in page], list(range(10, 20)))
+        self.assertLess(time.monotonic() - started, 2)
+
+        response, _ = self._get(f"/mcp_outbox?since={since}&limit=10", {"If-None-Match": response.getheader("ETag")})
+        self.assertEqual(response.status, 304)
+
+    def test_outbox_long_poll_wakes_on_new_message(self):
+        self._fill_outbox(1)
+        threading.Timer(0.2, self._fill_outbox, args=(1,)).start()
+        started = time.monotonic()
+        response, page = self._get("/mcp_outbox?since=0&wait=5")
+        self.assertEqual(len(page), 1)
+        self.assertLess(time.monotonic() - started, 4)
+
+        response, page = self._get(f"/mcp_outbox?since={page[-1]['offset']}&wait=0.2")
+        self.assertEqual(page, [])
+
+    def test_streams_cannot_take_every_worker(self):
+        conn = self._connect()  # max_workers=2 leaves one slot for streams and long-polls
+        conn.request("GET", "/mcp_outbox/stream")
+        self.assertEqual(conn.getresponse().status, 200)
+
+        other = self._connect()  # The remaining worker still serves this connection
+        other.request("GET", "/mcp_outbox?since=0&wait=5")
+        response = other.getresponse()
+        response.read()
+        self.assertEqual(response.status, 503)
+        other.request("GET", "/health")
+        self.assertEqual(json.loads(other.getresponse().read()), {"status": "ok"})
+        other.close()
+        conn.close()
+
+    def test_outbox_stream(self):
+        self._fill_outbox(1)
+        conn = self._connect()
+        conn.request("GET", "/mcp_outbox/stream")
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        threading.Timer(0.1, self._fill_outbox, args=(1,)).start()
+        events = []
+        while len(events) < 2:
+            line = response.fp.readline().decode()
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+        self.assertEqual([e["offset"] for e in events], [0, 1])
+        conn.close()
+
+    def test_gzip_negotiation(self):
+        self._fill_outbox(20)
+        conn = self._connect()
+        conn.request("GET", "/mcp_outbox", headers={"Accept-Encoding": "gzip"})
+        response = conn.getresponse()
+        body = response.read()
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(body))), 20)
+
+        conn.request("GET", "/health", headers={"Accept-Encoding": "gzip"})
+        response = conn.getresponse()
+        self.assertIsNone(response.getheader("Content-Encoding"))  # Too small to be worth it
+        self.assertEqual(response.read(), b'{"status":"ok"}')
+        conn.close()
+
+    def test_gzip_request_body(self):
+        body = gzip.compress(json.dumps([{"event_type": "external.alert"}] * 3).encode())
+        conn = self._connect()
+        conn.request("POST", "/mcp_inbox/batch", body, {"Content-Encoding": "gzip"})
+        response = conn.getresponse()
+        self.assertEqual(len(json.loads(response.read())["results"]), 3)
+        conn.close()
+
+    @unittest.skipIf(mcp_codec.msgpack is not None, "msgpack installed")
+    def test_msgpack_falls_back_to_json(self):
+        response, body = self._get("/health", {"Accept": "application/msgpack"})
+        self.assertEqual(response.getheader("Content-Type"), "application/json")
+        self.assertEqual(body, {"status": "ok"})
+
+        conn = self._connect()
+        conn.request("POST", "/mcp_inbox", b"\x81", {"Content-Type": "application/msgpack"})
+        self.assertEqual(conn.getresponse().status, 415)
+        conn.close()
+
+    @unittest.skipIf(mcp_codec.msgpack is None, "msgpack not installed")
+    def test_msgpack_round_trip(self):
+        body = mcp_codec.msgpack.packb([{"event_type": "external.alert"}])
+        conn = self._connect()
+        conn.request("POST", "/mcp_inbox/batch", body,
+                     {"Content-Type": "application/msgpack", "Accept": "application/msgpack"})
+        response = conn.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "application/msgpack")
+        self.assertEqual(mcp_codec.msgpack.unpackb(response.read())["results"][0]["status"], "received")
+        conn.close()
+
+    def test_excess_connections_get_503(self):
+        idle = [socket.create_connection(("localhost", self.port)) for _ in range(2)]
+        time.sleep(0.1)  # Let both occupy the two workers
+        conn = self._connect()
+        conn.request("GET", "/health")
+        self.assertEqual(conn.getresponse().status, 503)
+        conn.close()
+        for sock in idle:
+            sock.close()
+
+class TestCodecNegotiation(unittest.TestCase):
+    def test_gzip_q_values(self):
+        self.assertTrue(mcp_codec.accepts_gzip("gzip, deflate"))
+        self.assertTrue(mcp_codec.accepts_gzip("deflate, *;q=0.5"))
+        self.assertFalse(mcp_codec.accepts_gzip("gzip;q=0"))
+        self.assertFalse(mcp_codec.accepts_gzip("gzip;q=0, *"))
+        self.assertFalse(mcp_codec.accepts_gzip(None))
+
+    def test_accept_q_values(self):
+        with mock.patch.object(mcp_codec, "msgpack", object()):
+            self.assertEqual(mcp_codec.negotiate("application/msgpack"), "application/msgpack")
+            self.assertEqual(mcp_codec.negotiate("application/msgpack;q=0, */*"), "application/json")
+            self.assertEqual(mcp_codec.negotiate("application/json, application/msgpack;q=0.5"), "application/json")
+            self.assertEqual(mcp_codec.negotiate("application/json;q=0.2, application/x-msgpack"), "application/msgpack")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import tempfile
+import os
+from unittest import mock
+from core.ids import MessageIdGenerator
+from core.mcp_manager import MCPManager
+from core.mcp_storage import JsonMessageStore, SQLiteMessageStore
+
+class MCPManagerContract:
+    """Behaviour both storage backends must share."""
+
+    message_file = None
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = MCPManager(os.path.join(self.temp_dir, self.message_file))
+
+    def test_send_and_read(self):
+        self.manager.send_message("bus", "mcp_agents", {"event_type": "deploy.success"})
+        self.manager.send_message("bus", "other", {"event_type": "rl.learned"})
+
+        inbox = self.manager.read_messages("mcp_agents")
+        self.assertEqual(len(inbox), 1)
+        self.assertEqual(inbox[0]["content"], {"event_type": "deploy.success"})
+        self.assertFalse(inbox[0]["processed"])
+
+    def test_mark_processed(self):
+        self.manager.send_message("bus", "mcp_agents", {"n": 1})
+        message_id = self.manager.read_messages("mcp_agents")[0]["id"]
+        self.manager.mark_processed(message_id)
+
+        self.assertEqual(self.manager.read_unprocessed_messages("mcp_agents"), [])
+        self.assertEqual(self.manager.get_message_stats(), {"total": 1, "processed": 1, "unprocessed": 0})
+
+    def test_clear_processed(self):
+        self.manager.send_message("bus", "mcp_agents", {"n": 1})
+        self.manager.mark_processed(self.manager.read_messages("mcp_agents")[0]["id"])
+        self.manager.clear_processed_messages()
+        self.assertEqual(self.manager.get_message_stats()["total"], 0)
+
+    def test_send_messages_batch(self):
+        ids = self.manager.send_messages([
+            {"sender": "bus", "receiver": "mcp_agents", "content": {"n": i}} for i in range(5)
+        ])
+        self.assertEqual(len(ids), 5)
+        self.assertEqual([m["content"]["n"] for m in self.manager.read_messages("mcp_agents")], list(range(5)))
+
+    def test_mark_processed_many(self):
+        ids = self.manager.send_messages([
+            {"sender": "bus", "receiver": "mcp_agents", "content": {"n": i}} for i in range(3)
+        ])
+        self.manager.mark_processed_many(ids)
+        self.assertEqual(self.manager.get_message_stats()["unprocessed"], 0)
+        self.assertEqual(self.manager.mark_processed_many(ids), 0)
+
+    def test_claim_unprocessed(self):
+        self.manager.send_messages([
+            {"sender": "bus", "receiver": "mcp_agents", "content": {"n": i}} for i in range(5)
+        ])
+        self.manager.send_message("bus", "other", {"n": 99})
+
+        first = self.manager.claim_unprocessed("mcp_agents", limit=3)
+        rest = self.manager.claim_unprocessed("mcp_agents")
+        self.assertEqual([m["content"]["n"] for m in first], [0, 1, 2])
+        self.assertEqual([m["content"]["n"] for m in rest], [3, 4])
+        self.assertTrue(all(m["processed"] for m in first + rest))
+        self.assertEqual(self.manager.claim_unprocessed("mcp_agents"), [])
+        self.assertEqual(self.manager.get_message_stats()["unprocessed"], 1)
+
+    def test_clear(self):
+        self.manager.send_message("bus", "mcp_agents", {"n": 1})
+        self.manager.clear_messages()
+        self.assertEqual(self.manager.read_messages("mcp_agents"), [])
+
+    def test_burst_ids_are_unique_and_sorted(self):
+        ids = [self.manager.send_message("bus", "mcp_agents", {"n": i}) for i in range(50)]
+        self.assertEqual(len(set(ids)), 50)
+        self.assertEqual(ids, sorted(ids))
+
+        self.manager.mark_processed(ids[10])
+        unprocessed = [m["content"]["n"] for m in self.manager.read_unprocessed_messages("mcp_agents")]
+        self.assertNotIn(10, unprocessed)
+        self.assertEqual(len(unprocessed), 49)
+
+    def test_idempotent_resend(self):
+        first = self.manager.send_message("bus", "mcp_agents", {"n": 1}, message_id="evt-1")
+        second = self.manager.send_message("bus", "mcp_agents", {"n": 1}, message_id="evt-1")
+        self.manager.send_messages([{"id": "evt-1", "sender": "bus", "receiver": "mcp_agents", "content": {"n": 1}}])
+        self.assertEqual(first, second)
+        self.assertEqual(self.manager.get_message_stats()["total"], 1)
+
+    def test_get_message(self):
+        message_id = self.manager.send_message("bus", "mcp_agents", {"n": 7})
+        self.assertEqual(self.manager.get_message(message_id)["content"], {"n": 7})
+        self.assertIsNone(self.manager.get_message("missing"))
+
+    def test_read_messages_since(self):
+        self.manager.send_messages([
+            {"sender": "bus", "receiver": "a" if i % 2 else "b", "content": {"n": i}} for i in range(6)
+        ])
+        first, cursor = self.manager.read_messages_since("a", limit=2)
+        rest, cursor = self.manager.read_messages_since("a", cursor)
+        self.assertEqual([m["content"]["n"] for m in first + rest], [1, 3, 5])
+        self.assertEqual(self.manager.read_messages_since("a", cursor), ([], cursor))
+
+    def test_read_new_messages_advances_cursor(self):
+        self.manager.send_message("bus", "a", {"n": 1})
+        self.assertEqual(len(self.manager.read_new_messages("a")), 1)
+        self.assertEqual(self.manager.read_new_messages("a"), [])
+
+        self.manager.send_message("bus", "a", {"n": 2})
+        other = MCPManager(self.manager.message_file)
+        self.assertEqual([m["content"]["n"] for m in other.read_new_messages("a")], [2])
+
+    def test_cursor_survives_clear(self):
+        self.manager.send_message("bus", "a", {"n": 1})
+        self.manager.read_new_messages("a")
+        self.manager.clear_messages()
+        self.manager.send_message("bus", "a", {"n": 2})
+        self.assertEqual([m["content"]["n"] for m in self.manager.read_new_messages("a")], [2])
+
+    def test_returned_messages_are_copies(self):
+        message_id = self.manager.send_message("bus", "mcp_agents", {"data": {}})
+        self.manager.read_messages("mcp_agents")[0]["content"]["data"]["mutated"] = True
+        self.assertEqual(self.manager.get_message(message_id)["content"], {"data": {}})
+
+class TestMessageIdGenerator(unittest.TestCase):
+    def test_monotonic_within_one_millisecond(self):
+        generate = MessageIdGenerator()
+        ids = [generate() for _ in range(1000)]
+        self.assertEqual(len(set(ids)), 1000)
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(i.startswith("msg_") for i in ids))
+
+    def test_generators_do_not_collide(self):
+        a, b = MessageIdGenerator(), MessageIdGenerator()
+        self.assertNotEqual(a(), b())
+
+class TestJsonBackend(MCPManagerContract, unittest.TestCase):
+    message_file = "messages.json"
+
+    def test_backend_selected(self):
+        self.assertIsInstance(self.manager.store, JsonMessageStore)
+
+    def test_unchanged_marks_skip_the_rewrite(self):
+        message_id = self.manager.send_message("bus", "mcp_agents", {"n": 1})
+        self.manager.mark_processed(message_id)
+        with mock.patch.object(self.manager.store.state, "write") as write:
+            self.manager.mark_processed("unknown")
+            self.manager.mark_processed(message_id)  # Already processed
+            self.assertEqual(self.manager.mark_processed_many(["unknown", message_id]), 0)
+        write.assert_not_called()
+
+class TestSQLiteBackend(MCPManagerContract, unittest.TestCase):
+    message_file = "messages.db"
+
+    def test_backend_selected(self):
+        self.assertIsInstance(self.manager.store, SQLiteMessageStore)
+
+    def test_wal_mode(self):
+        mode = self.manager.store._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_no_truncation(self):
+        for i in range(1100):
+            self.manager.send_message("bus", "mcp_agents", {"n": i})
+        self.assertEqual(self.manager.get_message_stats()["total"], 1100)
+
+    def test_shared_between_managers(self):
+        other = MCPManager(self.manager.message_file)
+        self.manager.send_message("bus", "mcp_agents", {"n": 1})
+        self.assertEqual(len(other.read_messages("mcp_agents")), 1)
+
+if __name__ == "__main__":
+    unittest.main()
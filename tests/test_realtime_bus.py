@@ -1,11 +1,19 @@
 import unittest
 import tempfile
 import os
+import csv
+import threading
+import time
 from core.realtime_bus import RealtimeBus
 
 class TestRealtimeBus(unittest.TestCase):
     def setUp(self):
-        self.bus = RealtimeBus()
+        self.temp_dir = tempfile.mkdtemp()
+        self.performance_log = os.path.join(self.temp_dir, "performance_log.csv")
+        self.bus = RealtimeBus(performance_log=self.performance_log)
+    
+    def tearDown(self):
+        self.bus.metrics.close()
     
     def test_create_queue(self):
         self.bus.create_queue("test_topic")
@@ -27,6 +35,152 @@ class TestRealtimeBus(unittest.TestCase):
         
         self.assertEqual(len(received_messages), 1)
     
+    def test_publish_many(self):
+        received = []
+        self.bus.subscribe("deployments", received.append)
+        self.bus.publish_many("deployments", [{"id": i} for i in range(10)])
+        
+        self.assertEqual(self.bus.message_count, 10)
+        self.assertEqual([m["id"] for m in received], list(range(10)))
+        self.assertEqual(len({m["timestamp"] for m in received}), 1)
+        self.assertEqual(len(self.bus.get_messages("deployments", timeout=0.01)), 10)
+    
+    def test_batch_context(self):
+        received = []
+        self.bus.subscribe("deployments", received.append)
+        
+        with self.bus.batch():
+            self.bus.publish("deployments", {"id": 1})
+            self.bus.publish("scaling", {"id": 2})
+            with self.bus.batch():
+                self.bus.publish("deployments", {"id": 3})
+            self.assertEqual(received, [])
+        
+        self.assertEqual([m["id"] for m in received], [1, 3])
+        self.assertEqual(self.bus.message_count, 3)
+    
+    def test_performance_log_is_buffered(self):
+        for i in range(50):
+            self.bus.publish("deployments", {"id": i})
+        self.bus.publish("scaling", {"id": 0})
+        
+        with open(self.performance_log) as f:
+            self.assertEqual(len(list(csv.reader(f))), 1)  # Header only until flush
+        
+        self.bus.metrics.flush()
+        with open(self.performance_log) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r["event_type"] for r in rows], ["message_published_deployments", "message_published_scaling"])
+        self.assertEqual(rows[0]["queue_size"], "50")
+        self.assertEqual(rows[-1]["total_messages"], "51")
+        
+        with open(self.bus.metrics.latency_log) as f:
+            latency_rows = list(csv.DictReader(f))
+        self.assertEqual(latency_rows[0]["messages"], "50")
+        self.assertLessEqual(float(latency_rows[0]["p50_ms"]), float(latency_rows[0]["p99_ms"]))
+    
+    def test_concurrent_publishers(self):
+        threads_count, per_thread, topics = 64, 200, 8
+        received = []
+        received_lock = threading.Lock()
+        start = threading.Barrier(threads_count)
+        
+        def on_message(message):
+            with received_lock:
+                received.append(message)
+        
+        def publisher(n):
+            start.wait()
+            topic = f"topic_{n % topics}"
+            if n < topics:
+                self.bus.subscribe(topic, on_message)
+            for i in range(per_thread):
+                self.bus.publish(topic, {"publisher": n, "seq": i})
+        
+        threads = [threading.Thread(target=publisher, args=(n,)) for n in range(threads_count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        total = threads_count * per_thread
+        self.assertEqual(self.bus.message_count, total)
+        self.assertEqual(len(self.bus.queues), topics)
+        self.assertEqual(sum(q.qsize() for q in self.bus.queues.values()), total)
+        self.assertEqual(self.bus.metrics.total_messages, total)
+        self.assertTrue(all(len(subs) == 1 for subs in self.bus.subscribers.values()))
+        self.assertLessEqual(len(received), total)
+    
+    def test_create_queue_keeps_existing_messages(self):
+        self.bus.publish("test_topic", {"id": 1})
+        self.bus.create_queue("test_topic")
+        self.assertEqual(self.bus.queues["test_topic"].qsize(), 1)
+    
+    def test_drain_returns_immediately(self):
+        for i in range(5):
+            self.bus.publish("deployments", {"id": i})
+        
+        start = time.monotonic()
+        self.assertEqual(len(self.bus.drain("deployments", max_items=3)), 3)
+        self.assertEqual(len(self.bus.get_messages("deployments", timeout=1.0)), 2)
+        self.assertEqual(self.bus.drain("deployments"), [])
+        self.assertLess(time.monotonic() - start, 0.5)
+    
+    def test_drain_waits_for_first_message(self):
+        self.bus.create_queue("deployments")
+        threading.Timer(0.05, self.bus.publish, args=("deployments", {"id": 1})).start()
+        self.assertEqual(len(self.bus.drain("deployments", max_wait=5.0)), 1)
+    
+    def test_select_wakes_on_first_ready_topic(self):
+        self.bus.create_queue("deployments")
+        self.bus.create_queue("scaling")
+        threading.Timer(0.05, self.bus.publish, args=("scaling", {"id": 1})).start()
+        
+        start = time.monotonic()
+        ready = self.bus.select(["deployments", "scaling"], timeout=5.0)
+        self.assertEqual(list(ready), ["scaling"])
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertEqual(self.bus.select(["deployments", "scaling"], timeout=0.05), {})
+    
+    def test_bounded_buffer_drops_oldest(self):
+        bus = RealtimeBus(performance_log=self.performance_log, buffer_capacity=3)
+        for i in range(5):
+            bus.publish("deployments", {"id": i})
+        
+        self.assertEqual([m["id"] for m in bus.drain("deployments")], [2, 3, 4])
+        self.assertEqual(bus.get_stats()["evicted_messages"], 2)
+        bus.metrics.close()
+    
+    def test_bounded_buffer_drops_newest(self):
+        bus = RealtimeBus(performance_log=self.performance_log, buffer_capacity=3, eviction_policy="drop_newest")
+        bus.publish_many("deployments", [{"id": i} for i in range(5)])
+        
+        self.assertEqual([m["id"] for m in bus.drain("deployments")], [0, 1, 2])
+        bus.metrics.close()
+    
+    def test_on_demand_skips_push_only_topics(self):
+        bus = RealtimeBus(performance_log=self.performance_log, buffer_mode="on_demand")
+        received = []
+        bus.subscribe("deployments", received.append)
+        bus.publish("deployments", {"id": 1})
+        bus.publish("scaling", {"id": 1})
+        
+        self.assertEqual(len(received), 1)
+        self.assertEqual(bus.get_stats()["buffers"]["deployments"]["size"], 0)
+        self.assertEqual(bus.get_stats()["buffers"]["scaling"]["size"], 1)
+        
+        # Once pulled, the topic is buffered for its pull consumer too
+        self.assertEqual(bus.drain("deployments"), [])
+        bus.publish("deployments", {"id": 2})
+        self.assertEqual([m["id"] for m in bus.drain("deployments")], [2])
+        bus.metrics.close()
+    
+    def test_memory_stats(self):
+        self.bus.publish("deployments", {"payload": "x" * 1000})
+        stats = self.bus.get_stats()
+        self.assertEqual(stats["buffered_messages"], 1)
+        self.assertGreater(stats["memory_bytes"], 1000)
+    
     def test_get_stats(self):
         self.bus.publish("test_topic", {"test": "data"})
         stats = self.bus.get_stats()
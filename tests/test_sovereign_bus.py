@@ -0,0 +1,195 @@
+import unittest
+import asyncio
+import tempfile
+import os
+import json
+import threading
+import time
+from core.event_log import SegmentedEventLog
+from core.sovereign_bus import SovereignBus
+
+class TestSegmentedEventLog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_dir = os.path.join(self.temp_dir, "events")
+
+    def test_append_assigns_offsets(self):
+        log = SegmentedEventLog(self.log_dir)
+        self.assertEqual(log.append({"n": 0}), 0)
+        self.assertEqual(log.append({"n": 1}), 1)
+        self.assertEqual(log.next_offset, 2)
+
+    def test_append_many(self):
+        log = SegmentedEventLog(self.log_dir, segment_bytes=200)
+        log.append({"n": -1})
+        self.assertEqual(log.append_many([{"n": i} for i in range(30)]), list(range(1, 31)))
+        self.assertEqual([r["n"] for r in log.read(0)], list(range(-1, 30)))
+        self.assertEqual(log.append_many([]), [])
+
+    def test_read_from_offset(self):
+        log = SegmentedEventLog(self.log_dir)
+        for i in range(200):
+            log.append({"n": i})
+
+        records = log.read(150, limit=10)
+        self.assertEqual([r["n"] for r in records], list(range(150, 160)))
+        self.assertEqual(records[0]["offset"], 150)
+
+    def test_rollover_and_retention(self):
+        log = SegmentedEventLog(self.log_dir, segment_bytes=200, retention_segments=3)
+        for i in range(100):
+            log.append({"n": i})
+
+        segments = [f for f in os.listdir(self.log_dir) if f.endswith(".jsonl")]
+        self.assertEqual(len(segments), 3)
+        self.assertGreater(log.first_offset, 0)
+        self.assertEqual(log.read(0)[0]["offset"], log.first_offset)
+        self.assertEqual(log.read(0)[-1]["n"], 99)
+
+    def test_compact_keeps_unconsumed_segments(self):
+        log = SegmentedEventLog(self.log_dir, segment_bytes=200)
+        for i in range(100):
+            log.append({"n": i})
+
+        self.assertGreater(log.compact(50), 0)
+        self.assertLessEqual(log.first_offset, 50)
+        self.assertEqual(log.read(50)[0]["n"], 50)
+        log.compact(log.next_offset)
+        self.assertEqual(log.read(0)[-1]["n"], 99)
+
+    def test_reopen_recovers_offsets(self):
+        log = SegmentedEventLog(self.log_dir, segment_bytes=200)
+        for i in range(20):
+            log.append({"n": i})
+        log.close()
+
+        reopened = SegmentedEventLog(self.log_dir, segment_bytes=200)
+        self.assertEqual(reopened.next_offset, 20)
+        self.assertEqual(reopened.append({"n": 20}), 20)
+
+    def test_reader_sees_other_writer(self):
+        writer = SegmentedEventLog(self.log_dir, segment_bytes=200)
+        reader = SegmentedEventLog(self.log_dir, segment_bytes=200)
+        for i in range(30):
+            writer.append({"n": i})
+
+        self.assertEqual([r["n"] for r in reader.tail(3)], [27, 28, 29])
+
+    def test_torn_tail_is_discarded(self):
+        log = SegmentedEventLog(self.log_dir)
+        log.append({"n": 0})
+        log.close()
+        segment = os.path.join(self.log_dir, sorted(os.listdir(self.log_dir))[-1])
+        with open(segment, "ab") as f:
+            f.write(b'{"n": 1, "trunc')
+
+        log = SegmentedEventLog(self.log_dir)
+        self.assertEqual(log.append({"n": 2}), 1)
+        self.assertEqual([r["n"] for r in log.read(0)], [0, 2])
+
+class TestSovereignBus(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.bus = SovereignBus(log_dir=os.path.join(self.temp_dir, "bus"), legacy_file=None)
+
+    def test_publish_persists_and_notifies(self):
+        received = []
+        self.bus.subscribe("deploy.success", received.append)
+        self.bus.publish("deploy.success", {"dataset": "a.csv"})
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(self.bus.get_messages("deploy.success")[0]["data"], {"dataset": "a.csv"})
+
+    def test_history_limit(self):
+        self.bus.history_limit = 5
+        for i in range(20):
+            self.bus.publish("rl.learned", {"i": i})
+
+        messages = self.bus.get_messages()
+        self.assertEqual([m["data"]["i"] for m in messages], list(range(15, 20)))
+
+    def test_read_since(self):
+        for i in range(5):
+            self.bus.publish("deploy.success", {"i": i})
+
+        messages, offset = self.bus.read_since(2)
+        self.assertEqual([m["data"]["i"] for m in messages], [2, 3, 4])
+        self.assertEqual(offset, 5)
+        self.assertEqual(self.bus.read_since(offset), ([], 5))
+
+    def test_poll_wakes_on_publish(self):
+        timer = threading.Timer(0.05, self.bus.publish, args=("system.up", {}))
+        timer.start()
+        start = time.monotonic()
+        messages, offset = self.bus.poll(0, timeout=5.0)
+        timer.join()
+
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(offset, 1)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_poll_timeout(self):
+        messages, offset = self.bus.poll(0, timeout=0.05)
+        self.assertEqual((messages, offset), ([], 0))
+
+    def test_consumer_group_commits_offset(self):
+        self.bus.publish("deploy.success", {"i": 0})
+        self.assertEqual(self.bus.consume("monitor", timeout=0), [])
+
+        self.bus.publish("deploy.success", {"i": 1})
+        self.bus.publish("deploy.success", {"i": 2})
+        self.assertEqual([m["data"]["i"] for m in self.bus.consume("monitor", limit=1)], [1])
+        self.assertEqual([m["data"]["i"] for m in self.bus.consume("monitor")], [2])
+        self.assertEqual(self.bus.event_log.committed("monitor"), 3)
+
+    def test_coroutine_subscriber_runs_on_attached_loop(self):
+        async def scenario():
+            received = asyncio.Event()
+            seen = []
+
+            async def on_event(message):
+                seen.append(message["event_type"])
+                received.set()
+
+            self.bus.attach_loop()
+            self.bus.subscribe("deploy.success", on_event)
+            publisher = threading.Thread(target=self.bus.publish, args=("deploy.success", {}))
+            publisher.start()
+            await asyncio.wait_for(received.wait(), 5)
+            publisher.join()
+            return seen
+
+        self.assertEqual(asyncio.run(scenario()), ["deploy.success"])
+
+    def test_coroutine_subscriber_without_loop_is_not_leaked(self):
+        async def on_event(message):
+            pass
+
+        self.bus.subscribe("deploy.success", on_event)
+        self.bus.publish("deploy.success", {})
+        self.assertEqual(len(self.bus.get_messages("deploy.success")), 1)
+
+    def test_stream(self):
+        async def scenario():
+            stream = self.bus.stream("heal.triggered")
+            first = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)  # Let the stream subscribe
+            threading.Thread(target=self.bus.publish, args=("heal.triggered", {"n": 1})).start()
+            message = await asyncio.wait_for(first, 5)
+            await stream.aclose()
+            return message
+
+        message = asyncio.run(scenario())
+        self.assertEqual(message["data"], {"n": 1})
+        self.assertEqual(self.bus.router.match("heal.triggered"), ())
+
+    def test_legacy_import(self):
+        legacy = os.path.join(self.temp_dir, "bus_events.json")
+        with open(legacy, "w") as f:
+            json.dump([{"timestamp": "t", "event_type": "system.up", "data": {}}], f)
+
+        bus = SovereignBus(log_dir=os.path.join(self.temp_dir, "migrated"), legacy_file=legacy)
+        self.assertEqual(bus.get_messages("system.up")[0]["offset"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
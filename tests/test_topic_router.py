@@ -0,0 +1,46 @@
+import unittest
+from core.topic_router import TopicRouter, topic_matches
+
+class TestTopicRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = TopicRouter()
+
+    def test_exact_match(self):
+        self.router.add("deploy.success", "a")
+        self.assertEqual(self.router.match("deploy.success"), ("a",))
+        self.assertEqual(self.router.match("deploy.failure"), ())
+
+    def test_single_segment_wildcard(self):
+        self.router.add("deploy.*", "a")
+        self.assertEqual(self.router.match("deploy.failure"), ("a",))
+        self.assertEqual(self.router.match("deploy"), ())
+        self.assertEqual(self.router.match("deploy.failure.retry"), ())
+
+    def test_multi_segment_wildcard(self):
+        self.router.add("#", "all")
+        self.router.add("heal.#", "heal")
+        self.assertEqual(self.router.match("heal"), ("all", "heal"))
+        self.assertEqual(self.router.match("heal.success"), ("all", "heal"))
+        self.assertEqual(self.router.match("system.down"), ("all",))
+
+    def test_registration_order_and_dedup(self):
+        self.router.add("rl.learned", "exact")
+        self.router.add("#.learned", "suffix")
+        self.router.add("#.#", "any")
+        self.assertEqual(self.router.match("rl.learned"), ("exact", "suffix", "any"))
+
+    def test_cache_invalidated_on_change(self):
+        self.assertEqual(self.router.match("system.up"), ())
+        self.router.add("system.*", "a")
+        self.assertEqual(self.router.match("system.up"), ("a",))
+        self.assertTrue(self.router.remove("system.*", "a"))
+        self.assertEqual(self.router.match("system.up"), ())
+        self.assertFalse(self.router.remove("system.*", "a"))
+
+    def test_topic_matches(self):
+        self.assertTrue(topic_matches("deploy.*", "deploy.success"))
+        self.assertTrue(topic_matches("#", "issue.detected"))
+        self.assertFalse(topic_matches("heal.*", "heal"))
+
+if __name__ == "__main__":
+    unittest.main()